@@ -0,0 +1,72 @@
+import argparse
+import sys
+import time
+from src.inline_markdown import text_to_textnodes
+
+# Inputs that make naive inline parsers backtrack or rescan: each one is
+# built to a target length so timings at n and 4n can be compared.
+CASES = {
+    "many_links": lambda n: "[a](b) " * (n // 7),
+    "many_images": lambda n: "![a](b) " * (n // 8),
+    "open_brackets": lambda n: "[" * n,
+    "open_images": lambda n: "![" * (n // 2),
+    "unclosed_links": lambda n: "[a](" * (n // 4),
+    "unclosed_text": lambda n: "[a" * (n // 2) + "](b",
+    "closers": lambda n: "](" * (n // 2),
+    "underscores": lambda n: "_" * n,
+    "stars": lambda n: "**" * (n // 2),
+    "mixed": lambda n: "[a](**_`" * (n // 8),
+}
+
+
+def time_case(make_text, size, repeat):
+    text = make_text(size)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            text_to_textnodes(text)
+        except ValueError:
+            # Unpaired delimiters are rejected, but only after the scan
+            pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def scaling(make_text, size, repeat=3):
+    # Linear code takes ~4x as long on 4x the input; quadratic takes ~16x
+    small = time_case(make_text, size, repeat)
+    large = time_case(make_text, size * 4, repeat)
+    return small, large, large / max(small, 1e-6)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that inline parsing stays linear on adversarial input"
+    )
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=8.0,
+        help="largest allowed slowdown for 4x the input (default 8)",
+    )
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'case':<16} {'n (ms)':>10} {'4n (ms)':>10} {'ratio':>7}")
+    for name, make_text in CASES.items():
+        small, large, ratio = scaling(make_text, args.size, args.repeat)
+        print(f"{name:<16} {small * 1000:10.2f} {large * 1000:10.2f} {ratio:7.1f}")
+        if ratio > args.max_ratio:
+            failures.append(name)
+    if failures:
+        print(f"Superlinear scaling: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
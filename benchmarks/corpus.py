@@ -0,0 +1,138 @@
+import argparse
+import os
+import random
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom and carried "
+    "across middle earth by hobbits elves dwarves and men who walked the "
+    "long road from the shire to rivendell moria lothlorien and gondor"
+).split()
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "code": 1,
+    "quote": 1,
+    "unordered_list": 2,
+    "ordered_list": 1,
+}
+
+
+def _plain_words(rng, count):
+    return [rng.choice(WORDS) for _ in range(count)]
+
+
+def _inline_text(rng, word_count, inline_density):
+    # inline_density is the chance that any given word carries markup
+    words = []
+    for word in _plain_words(rng, word_count):
+        if rng.random() >= inline_density:
+            words.append(word)
+            continue
+        kind = rng.randrange(5)
+        if kind == 0:
+            words.append(f"**{word}**")
+        elif kind == 1:
+            words.append(f"_{word}_")
+        elif kind == 2:
+            words.append(f"`{word}`")
+        elif kind == 3:
+            words.append(f"[{word}](/blog/{word})")
+        else:
+            words.append(f"![{word}](/images/{word}.png)")
+    return " ".join(words)
+
+
+def generate_block(rng, block_type, inline_density):
+    if block_type == "heading":
+        level = rng.randint(2, 6)
+        return "#" * level + " " + _inline_text(rng, rng.randint(2, 8), inline_density)
+    if block_type == "code":
+        lines = [" ".join(_plain_words(rng, rng.randint(2, 8))) for _ in range(4)]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if block_type == "quote":
+        lines = rng.randint(1, 4)
+        return "\n".join(
+            "> " + _inline_text(rng, rng.randint(5, 15), inline_density)
+            for _ in range(lines)
+        )
+    if block_type == "unordered_list":
+        return "\n".join(
+            "- " + _inline_text(rng, rng.randint(3, 12), inline_density)
+            for _ in range(rng.randint(2, 8))
+        )
+    if block_type == "ordered_list":
+        return "\n".join(
+            f"{i}. " + _inline_text(rng, rng.randint(3, 12), inline_density)
+            for i in range(1, rng.randint(2, 9) + 1)
+        )
+    lines = rng.randint(1, 5)
+    return "\n".join(
+        _inline_text(rng, rng.randint(8, 20), inline_density) for _ in range(lines)
+    )
+
+
+def generate_page(rng, blocks=30, inline_density=0.1, block_mix=None):
+    block_mix = block_mix or DEFAULT_BLOCK_MIX
+    block_types = list(block_mix)
+    weights = [block_mix[block_type] for block_type in block_types]
+    parts = ["# " + " ".join(_plain_words(rng, rng.randint(2, 6)))]
+    for block_type in rng.choices(block_types, weights, k=blocks):
+        parts.append(generate_block(rng, block_type, inline_density))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_pages(pages=100, seed=0, blocks=30, inline_density=0.1, block_mix=None):
+    rng = random.Random(seed)
+    return [generate_page(rng, blocks, inline_density, block_mix) for _ in range(pages)]
+
+
+def write_site(
+    dest_dir, pages=100, seed=0, blocks=30, inline_density=0.1, block_mix=None
+):
+    # Lays pages out like content/: a few sections, one index.md per page
+    markdown_pages = generate_pages(pages, seed, blocks, inline_density, block_mix)
+    for i, markdown in enumerate(markdown_pages):
+        page_dir = os.path.join(dest_dir, f"section{i % 10}", f"page{i}")
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), "w") as f:
+            f.write(markdown)
+    return markdown_pages
+
+
+def parse_block_mix(value):
+    block_mix = {}
+    for item in value.split(","):
+        name, weight = item.split("=")
+        if name not in DEFAULT_BLOCK_MIX:
+            raise argparse.ArgumentTypeError(f"unknown block type: {name}")
+        block_mix[name] = float(weight)
+    return block_mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic content tree")
+    parser.add_argument("dest_dir")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--blocks", type=int, default=30)
+    parser.add_argument("--inline-density", type=float, default=0.1)
+    parser.add_argument(
+        "--block-mix",
+        type=parse_block_mix,
+        help="relative block weights, e.g. paragraph=6,code=1,unordered_list=2",
+    )
+    args = parser.parse_args()
+    write_site(
+        args.dest_dir,
+        args.pages,
+        args.seed,
+        args.blocks,
+        args.inline_density,
+        args.block_mix,
+    )
+    print(f"Wrote {args.pages} pages to {args.dest_dir}")
+
+
+if __name__ == "__main__":
+    main()
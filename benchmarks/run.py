@@ -0,0 +1,203 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.corpus import parse_block_mix, write_site
+from src.generate_page import generate_pages_recursive
+from src.inline_markdown import text_to_textnodes
+from src.markdown_blocks import markdown_to_blocks, markdown_to_html_node
+
+TEMPLATE = "<!doctype html><title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+def _inline_texts(markdown_pages):
+    texts = []
+    for markdown in markdown_pages:
+        for block in markdown_to_blocks(markdown):
+            if not block.startswith(("```", "#")):
+                texts.append(" ".join(block.split("\n")))
+    return texts
+
+
+def bench_text_to_textnodes(corpus):
+    texts = corpus["inline_texts"]
+
+    def run():
+        for text in texts:
+            text_to_textnodes(text)
+
+    return run, len(texts), sum(len(text) for text in texts)
+
+
+def bench_markdown_to_html_node(corpus):
+    pages = corpus["pages"]
+
+    def run():
+        for markdown in pages:
+            markdown_to_html_node(markdown)
+
+    return run, len(pages), corpus["bytes"]
+
+
+def bench_to_html(corpus):
+    nodes = [markdown_to_html_node(markdown) for markdown in corpus["pages"]]
+
+    def run():
+        for node in nodes:
+            node.to_html()
+
+    return run, len(nodes), corpus["bytes"]
+
+
+def bench_generate_pages_recursive(corpus):
+    content_dir = corpus["content_dir"]
+    template_path = corpus["template_path"]
+    dest_dir = corpus["dest_dir"]
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive("/", content_dir, template_path, dest_dir)
+
+    return run, len(corpus["pages"]), corpus["bytes"]
+
+
+BENCHMARKS = {
+    "text_to_textnodes": bench_text_to_textnodes,
+    "markdown_to_html_node": bench_markdown_to_html_node,
+    "ParentNode.to_html": bench_to_html,
+    "generate_pages_recursive": bench_generate_pages_recursive,
+}
+
+
+def run_benchmark(name, corpus, repeat):
+    run, items, size = BENCHMARKS[name](corpus)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+
+    # Tracing allocations slows the code down, so it gets its own pass
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "items": items,
+        "seconds": best,
+        "items_per_sec": items / best,
+        "mb_per_sec": size / best / 1e6,
+        "peak_kib": peak / 1024,
+    }
+
+
+def build_corpus(tmp_dir, args):
+    content_dir = os.path.join(tmp_dir, "content")
+    pages = write_site(
+        content_dir,
+        args.pages,
+        args.seed,
+        args.blocks,
+        args.inline_density,
+        args.block_mix,
+    )
+    template_path = os.path.join(tmp_dir, "template.html")
+    with open(template_path, "w") as f:
+        f.write(TEMPLATE)
+    return {
+        "pages": pages,
+        "bytes": sum(len(page.encode()) for page in pages),
+        "inline_texts": _inline_texts(pages),
+        "content_dir": content_dir,
+        "template_path": template_path,
+        "dest_dir": os.path.join(tmp_dir, "public"),
+    }
+
+
+CORPUS_OPTIONS = ["pages", "seed", "blocks", "inline_density", "block_mix"]
+
+
+def compare(results, baseline, threshold, config=None):
+    if config is not None:
+        for option in CORPUS_OPTIONS:
+            if baseline["config"].get(option) != config.get(option):
+                print(f"Warning: baseline used a different --{option}")
+    regressions = []
+    for name, base in baseline["results"].items():
+        current = results.get(name)
+        if current is None:
+            continue
+        change = current["mb_per_sec"] / base["mb_per_sec"] - 1
+        status = "ok"
+        if change < -threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        print(f"{name:<26} {change:+8.1%}  {status}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'benchmark':<26} {'items/s':>10} {'MB/s':>8} {'peak KiB':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<26} {result['items_per_sec']:10.1f} "
+            f"{result['mb_per_sec']:8.2f} {result['peak_kib']:10.1f}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure site generator throughput")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--blocks", type=int, default=30)
+    parser.add_argument("--inline-density", type=float, default=0.1)
+    parser.add_argument("--block-mix", type=parse_block_mix)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--only", action="append", choices=list(BENCHMARKS), help="run a subset"
+    )
+    parser.add_argument("--save", metavar="PATH", help="store results as a baseline")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="fail if slower than this baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed throughput drop before --compare fails (default 0.1)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.only or list(BENCHMARKS)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus = build_corpus(tmp_dir, args)
+        results = {name: run_benchmark(name, corpus, args.repeat) for name in names}
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, vars(args))
+        if regressions:
+            print(f"Throughput regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import json
+import os
+from src.build_manifest import hash_file
+from src.copy_static import sync_file
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+HASH_LENGTH = 8
+
+
+def fingerprinted_name(name, digest):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def fingerprint_files_recursive(
+    current_source_path, current_dest_path, manifest=None, compare="mtime", url="/"
+):
+    # Copies each file to name.<hash>.ext and returns the URL mapping,
+    # e.g. {"/images/a.png": "/images/a.1f2e3d4c.png"}
+    if not os.path.exists(current_dest_path):
+        print(f"Making directory: {current_dest_path}")
+        os.mkdir(current_dest_path)
+
+    assets = {}
+    for item in sorted(os.listdir(current_source_path)):
+        source_item_path = os.path.join(current_source_path, item)
+        if os.path.isfile(source_item_path):
+            if manifest is not None:
+                digest = manifest.file_hash(source_item_path)
+            else:
+                digest = hash_file(source_item_path)
+            name = fingerprinted_name(item, digest)
+            dest_item_path = os.path.join(current_dest_path, name)
+            sync_file(source_item_path, dest_item_path, manifest, compare)
+            assets[url + item] = url + name
+        else:
+            assets.update(
+                fingerprint_files_recursive(
+                    source_item_path,
+                    os.path.join(current_dest_path, item),
+                    manifest,
+                    compare,
+                    url + item + "/",
+                )
+            )
+    return assets
+
+
+def write_asset_manifest(dest_dir, assets, manifest=None):
+    path = os.path.join(dest_dir, ASSET_MANIFEST_NAME)
+    with open(path, "w") as f:
+        json.dump(assets, f, indent=2, sort_keys=True)
+    if manifest is not None:
+        manifest.record(path, {"generated": ASSET_MANIFEST_NAME})
+    return path
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+from src.staging import link_or_copy
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path, output_dir, entries=None, previous_dir=None):
+        self.path = path
+        self.output_dir = output_dir
+        # When building into a staging directory, previous_dir holds the
+        # last build's output and unchanged files are hard-linked from it.
+        self.previous_dir = previous_dir
+        self.entries = entries if entries is not None else {}
+        self.seen = set()
+        self.removed = set()
+        self.hashes = {}
+        # Whether entries came from a previous build's manifest. Without
+        # one, nothing in the output directory is known to be ours.
+        self.loaded = False
+
+    @classmethod
+    def load(cls, path, output_dir, previous_dir=None):
+        if not os.path.exists(path):
+            return cls(path, output_dir, previous_dir=previous_dir)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"Ignoring unreadable build manifest: {path}")
+            return cls(path, output_dir, previous_dir=previous_dir)
+        if data.get("version") != MANIFEST_VERSION:
+            print(f"Ignoring build manifest from another version: {path}")
+            return cls(path, output_dir, previous_dir=previous_dir)
+        manifest = cls(path, output_dir, data.get("outputs", {}), previous_dir)
+        manifest.loaded = True
+        return manifest
+
+    def save(self):
+        data = {"version": MANIFEST_VERSION, "outputs": self.entries}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def key(self, dest_path):
+        return os.path.relpath(dest_path, self.output_dir).replace(os.sep, "/")
+
+    def file_hash(self, path):
+        # Shared inputs such as the template are hashed once per build
+        if path not in self.hashes:
+            self.hashes[path] = hash_file(path)
+        return self.hashes[path]
+
+    def page_record(self, basepath, from_path, input_paths):
+        return {
+            "source": from_path,
+            "inputs": {path: self.file_hash(path) for path in input_paths},
+            "basepath": basepath,
+        }
+
+    def previous_path(self, dest_path):
+        if self.previous_dir is None:
+            return dest_path
+        return os.path.join(self.previous_dir, self.key(dest_path))
+
+    def is_fresh(self, dest_path, record):
+        return self.entries.get(self.key(dest_path)) == record and os.path.isfile(
+            self.previous_path(dest_path)
+        )
+
+    def reuse_previous(self, dest_path):
+        previous_path = self.previous_path(dest_path)
+        if previous_path != dest_path:
+            link_or_copy(previous_path, dest_path)
+
+    def is_tracked(self, key):
+        return key in self.entries or key in self.removed
+
+    def record(self, dest_path, record):
+        key = self.key(dest_path)
+        self.seen.add(key)
+        self.entries[key] = record
+
+    def remove_output(self, dest_path):
+        key = self.key(dest_path)
+        self.seen.discard(key)
+        self.removed.add(key)
+        self.entries.pop(key, None)
+        if os.path.isfile(dest_path):
+            print(f"Removing stale output: {dest_path}")
+            os.remove(dest_path)
+            self._prune_empty_dirs(os.path.dirname(dest_path))
+
+    def remove_stale(self):
+        for key in sorted(set(self.entries) - self.seen):
+            self.remove_output(os.path.join(self.output_dir, key))
+
+    def _prune_empty_dirs(self, dir_path):
+        output_dir = os.path.abspath(self.output_dir)
+        dir_path = os.path.abspath(dir_path)
+        while dir_path != output_dir and dir_path.startswith(output_dir + os.sep):
+            if os.listdir(dir_path):
+                return
+            os.rmdir(dir_path)
+            dir_path = os.path.dirname(dir_path)
@@ -0,0 +1,74 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from src.build_manifest import hash_file
+from src.profiler import profiler
+
+TEXT_EXTENSIONS = frozenset(
+    [".html", ".css", ".js", ".json", ".xml", ".svg", ".txt", ".map"]
+)
+DEFAULT_MIN_SIZE = 1024
+
+
+def _needs_sidecar(path, min_size):
+    _, ext = os.path.splitext(path)
+    return ext in TEXT_EXTENSIONS and os.path.getsize(path) >= min_size
+
+
+def _write_sidecar(path, gz_path):
+    with open(path, "rb") as f:
+        data = f.read()
+    # mtime=0 keeps the output identical for identical input
+    with open(gz_path, "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+
+def _compress_job(job):
+    key, path, gz_path, previous_record = job
+    record = {"gzip": key, "source_hash": hash_file(path)}
+    if record == previous_record:
+        return record, False
+    with profiler.span("gzip", "stage", path=path):
+        _write_sidecar(path, gz_path)
+    return record, True
+
+
+def compress_outputs(manifest, min_size=DEFAULT_MIN_SIZE, jobs=1):
+    # Writes a .gz sibling next to every text output of this build that is
+    # at least min_size bytes, for servers like nginx with gzip_static on.
+    # zlib releases the GIL, so a thread pool is enough to use every core.
+    output_dir = manifest.output_dir
+    sources = []
+    for key in sorted(manifest.seen):
+        record = manifest.entries.get(key)
+        if record is None or "gzip" in record:
+            continue
+        path = os.path.join(output_dir, key)
+        if os.path.isfile(path) and _needs_sidecar(path, min_size):
+            sources.append(key)
+        elif key + ".gz" in manifest.entries:
+            # Shrank below min_size since its sidecar was written
+            manifest.remove_output(path + ".gz")
+
+    for key, record in list(manifest.entries.items()):
+        if "gzip" in record and record["gzip"] not in manifest.entries:
+            manifest.remove_output(os.path.join(output_dir, key))
+
+    jobs_list = []
+    for key in sources:
+        gz_path = os.path.join(output_dir, key + ".gz")
+        previous_record = None
+        if os.path.isfile(manifest.previous_path(gz_path)):
+            previous_record = manifest.entries.get(key + ".gz")
+        path = os.path.join(output_dir, key)
+        jobs_list.append((key, path, gz_path, previous_record))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = executor.map(_compress_job, jobs_list)
+        for (_, path, gz_path, _), (record, written) in zip(jobs_list, results):
+            if written:
+                print(f"Compressing: {path} > {gz_path}")
+            else:
+                print(f"Skipping unchanged file: {gz_path}")
+                manifest.reuse_previous(gz_path)
+            manifest.record(gz_path, record)
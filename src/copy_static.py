@@ -1,18 +1,52 @@
 import os
 import shutil
+from src.build_manifest import hash_file
+from src.profiler import profiler
 
 
-def copy_files_recursive(current_source_path, current_dest_path):
+def files_match(source_path, dest_path, compare="mtime"):
+    if not os.path.isfile(dest_path):
+        return False
+    source_stat = os.stat(source_path)
+    dest_stat = os.stat(dest_path)
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+    if compare == "hash":
+        return hash_file(source_path) == hash_file(dest_path)
+    return source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def sync_file(source_path, dest_path, manifest=None, compare="mtime"):
+    with profiler.span("copy", "stage", path=source_path):
+        _sync_file(source_path, dest_path, manifest, compare)
+
+
+def _sync_file(source_path, dest_path, manifest, compare):
+    previous_path = dest_path if manifest is None else manifest.previous_path(dest_path)
+    if files_match(source_path, previous_path, compare):
+        print(f"Skipping unchanged file: {dest_path}")
+        if manifest is not None:
+            manifest.reuse_previous(dest_path)
+    else:
+        print(f"Copying: {source_path} > {dest_path}")
+        # copy2 keeps the source mtime so the next sync can compare it
+        shutil.copy2(source_path, dest_path)
+    if manifest is not None:
+        manifest.record(dest_path, {"static": source_path})
+
+
+def sync_files_recursive(
+    current_source_path, current_dest_path, manifest=None, compare="mtime"
+):
     if not os.path.exists(current_dest_path):
         print(f"Making directory: {current_dest_path}")
         os.mkdir(current_dest_path)
 
-    for item in os.listdir(current_source_path):
+    for item in sorted(os.listdir(current_source_path)):
         source_item_path = os.path.join(current_source_path, item)
         dest_item_path = os.path.join(current_dest_path, item)
 
         if os.path.isfile(source_item_path):
-            print(f"Copying: {source_item_path} > {dest_item_path}")
-            shutil.copy(source_item_path, dest_item_path)
+            sync_file(source_item_path, dest_item_path, manifest, compare)
         else:
-            copy_files_recursive(source_item_path, dest_item_path)
+            sync_files_recursive(source_item_path, dest_item_path, manifest, compare)
@@ -0,0 +1,79 @@
+import itertools
+import re
+
+FENCE = "---"
+
+_INT_RE = re.compile(r"-?[0-9]+")
+
+
+def split_front_matter(lines):
+    # Returns (metadata, remaining lines) for markdown that may open with a
+    # block of "key: value" lines between two --- fences. Only the front
+    # matter itself is read, so a file handle can be passed straight in
+    # and the rest left to the block scanner. A block that is unclosed or
+    # not valid front matter, such as a thematic break around text, is
+    # left as ordinary markdown.
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.rstrip("\n") != FENCE:
+        return {}, itertools.chain([first], lines)
+    head = []
+    for line in lines:
+        if line.rstrip("\n") == FENCE:
+            try:
+                metadata = parse_front_matter(line.rstrip("\n") for line in head)
+            except ValueError:
+                return {}, itertools.chain([first], head, [line], lines)
+            return metadata, lines
+        head.append(line)
+    # Never closed, so it was ordinary markdown after all
+    return {}, itertools.chain([first], head)
+
+
+def parse_front_matter(lines):
+    # A small YAML subset: "key: value" pairs whose values are strings,
+    # integers, true/false or lists, written either inline as [a, b] or
+    # as "- item" lines below an empty "key:". Dates stay strings.
+    metadata = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped == "-" or stripped.startswith("- "):
+            if key is None:
+                raise ValueError(f"invalid front matter line: {line}")
+            if metadata[key] is None:
+                metadata[key] = []
+            elif not isinstance(metadata[key], list):
+                raise ValueError(f"invalid front matter line: {line}")
+            metadata[key].append(_scalar(stripped[1:].strip()))
+            continue
+        name, separator, value = stripped.partition(":")
+        name = name.strip()
+        if not separator or not name:
+            raise ValueError(f"invalid front matter line: {line}")
+        key = name
+        metadata[key] = _value(value.strip())
+    return metadata
+
+
+def _value(text):
+    if not text:
+        return None
+    if text.startswith("[") and text.endswith("]"):
+        items = text[1:-1].split(",")
+        return [_scalar(item.strip()) for item in items if item.strip()]
+    return _scalar(text)
+
+
+def _scalar(text):
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text in ("true", "false"):
+        return text == "true"
+    if _INT_RE.fullmatch(text):
+        return int(text)
+    return text
@@ -1,45 +1,293 @@
 import os
-from src.markdown_blocks import markdown_to_html_node
+from concurrent.futures import ProcessPoolExecutor
+from src.front_matter import split_front_matter
+from src.markdown_blocks import (
+    BlockType,
+    PageInfo,
+    h1_text,
+    iter_blocks,
+    markdown_to_html_node,
+)
+from src.images import image_options
+from src.minify import minifier
+from src.profiler import profiler
+from src.render_cache import (
+    RENDERER_VERSION,
+    block_cache,
+    cache_variant,
+    page_cache,
+    render_variant,
+)
+from src.search_index import search_options
+from src.site_index import page_entry, page_url
+from src.template import load_template, select_template
+from src.url_resolver import url_resolver
 
 
 def extract_title(markdown):
-    lines = markdown.split("\n")
-    for line in lines:
-        words = line.split()
-        if words and words[0] == "#":
-            return line[1:].strip()
+    # The first H1 heading block, found the same way PageInfo.title is
+    _, lines = split_front_matter(markdown.split("\n"))
+    for block_type, block in iter_blocks(lines):
+        if block_type is BlockType.HEADING:
+            title = h1_text(block[0])
+            if title is not None:
+                return title
     raise ValueError("No H1 found in markdown")
 
 
-def generate_page(basepath, from_path, template_path, dest_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-
-    with open(from_path) as f:
-        markdown = f.read()
-    with open(template_path) as f:
-        html = f.read()
-        html = html.replace("{{ Title }}", extract_title(markdown))
-        html = html.replace("{{ Content }}", markdown_to_html_node(markdown).to_html())
-        html = html.replace('href="/', 'href="' + basepath)
-        html = html.replace('src="/', 'src="' + basepath)
+def iter_page(basepath, from_path, template_path, info=None):
+    # info, if given, is a PageInfo filled in with the page's metadata
+    with profiler.span("read", "stage"):
+        with open(from_path) as f:
+            markdown = f.read()
+    # Link and image nodes are resolved against the basepath as they are
+    # built, so the rendered page needs no rewriting afterwards
+    url_resolver.set_basepath(basepath)
+    with profiler.span("load_template", "stage"):
+        template = load_template(template_path, basepath)
+    if info is None:
+        info = PageInfo()
+    variant = cache_variant()
+    cached = page_cache.get(markdown, variant) if page_cache.enabled else None
+    if cached is not None:
+        data, html = cached
+        info.load(data)
+        chunks = [html]
+    else:
+        # The title comes out of the same pass that builds the content
+        node = markdown_to_html_node(markdown, info)
+        chunks = profiler.iter_span("to_html", node.iter_html(minifier.enabled))
+        if page_cache.enabled:
+            html = "".join(chunks)
+            page_cache.put(markdown, info.to_dict(), html, variant)
+            chunks = [html]
+    title = info.page_title()
+
+    return profiler.iter_span(
+        "template", template.iter_render({"Title": title, "Content": lambda: chunks})
+    )
+
+
+def render_page(basepath, from_path, template_path):
+    # The whole page as one string; builds stream iter_page into write_page
+    return "".join(iter_page(basepath, from_path, template_path))
+
+
+def write_page(dest_path, chunks):
     dest_dir_path = os.path.dirname(dest_path)
     if dest_dir_path != "":
         os.makedirs(dest_dir_path, exist_ok=True)
 
-    with open(os.path.join(dest_path), "w") as f:
-        f.write(html)
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    with profiler.span("write", "stage"):
+        with open(os.path.join(dest_path), "w") as f:
+            f.writelines(chunks)
 
 
-def generate_pages_recursive(basepath, dir_path_content, template_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        print(f"Making directory: {dest_dir_path}")
-        os.mkdir(dest_dir_path)
-    for item in os.listdir(dir_path_content):
+def page_log_message(from_path, template_path, dest_path):
+    return f"Generating page from {from_path} to {dest_path} using {template_path}"
+
+
+def generate_page(basepath, from_path, template_path, dest_path):
+    # Returns the page's PageInfo as a dict
+    print(page_log_message(from_path, template_path, dest_path))
+    info = PageInfo()
+    with profiler.span("page", "page", path=from_path):
+        write_page(dest_path, iter_page(basepath, from_path, template_path, info))
+    return info.to_dict()
+
+
+def _worker_settings():
+    # Everything a worker needs to render exactly like the parent process
+    return {
+        "profile": profiler.enabled,
+        "block_cache_bytes": block_cache.max_bytes,
+        "page_cache_dir": page_cache.directory,
+        "assets": url_resolver.assets,
+        "minify": minifier.enabled,
+        "images": image_options.settings(),
+        "search": search_options.enabled,
+    }
+
+
+def _init_worker(settings):
+    # Forked workers start with a copy of the parent's events; drop them
+    profiler.take_events()
+    profiler.take_totals()
+    if settings["profile"]:
+        profiler.enable()
+    block_cache.take_stats()
+    block_cache.configure(settings["block_cache_bytes"])
+    page_cache.take_stats()
+    page_cache.configure(settings["page_cache_dir"])
+    url_resolver.configure(settings["assets"])
+    minifier.configure(settings["minify"])
+    image_options.configure(*settings["images"])
+    search_options.configure(settings["search"])
+
+
+def _generate_page_job(job):
+    basepath, from_path, template_path, dest_path = job
+    info = PageInfo()
+    with profiler.span("page", "page", path=from_path):
+        write_page(dest_path, iter_page(basepath, from_path, template_path, info))
+    # Worker spans and cache counters travel back with the result to be
+    # merged into one trace and one set of totals
+    return (
+        info.to_dict(),
+        profiler.take_events(),
+        block_cache.take_stats(),
+        page_cache.take_stats(),
+    )
+
+
+def discover_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for item in sorted(os.listdir(dir_path_content)):
         source_item_path = os.path.join(dir_path_content, item)
         dest_item_path = os.path.join(dest_dir_path, item.replace(".md", ".html"))
         if os.path.isfile(source_item_path):
-            generate_page(basepath, source_item_path, template_path, dest_item_path)
+            pages.append((source_item_path, dest_item_path))
         else:
-            generate_pages_recursive(
-                basepath, source_item_path, template_path, dest_item_path
+            pages.extend(discover_pages(source_item_path, dest_item_path))
+    return pages
+
+
+def generate_pages(basepath, pages, template_path, jobs=1):
+    # template_path may also be a list giving each page its own template.
+    # Returns each page's PageInfo as a dict, in the order of pages.
+    if isinstance(template_path, str):
+        template_path = [template_path] * len(pages)
+    page_jobs = [
+        (basepath, from_path, page_template_path, dest)
+        for (from_path, dest), page_template_path in zip(pages, template_path)
+    ]
+    if jobs <= 1 or len(page_jobs) < 2:
+        return [generate_page(*job) for job in page_jobs]
+
+    # Workers render and write; logs are printed here in discovery order so
+    # parallel and serial builds produce the same output and the same log.
+    chunksize = max(1, len(page_jobs) // (jobs * 4))
+    infos = []
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(_worker_settings(),),
+    ) as executor:
+        results = executor.map(_generate_page_job, page_jobs, chunksize=chunksize)
+        for job, (info, events, block_stats, page_stats) in zip(page_jobs, results):
+            _, from_path, template_path, dest_path = job
+            print(page_log_message(from_path, template_path, dest_path))
+            infos.append(info)
+            profiler.events.extend(events)
+            block_cache.add_stats(block_stats)
+            page_cache.add_stats(page_stats)
+    return infos
+
+
+def generate_pages_recursive(
+    basepath,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    manifest=None,
+    jobs=1,
+    layouts_dir=None,
+    site_index=None,
+):
+    if not os.path.exists(dest_dir_path):
+        print(f"Making directory: {dest_dir_path}")
+        os.mkdir(dest_dir_path)
+
+    with profiler.span("discover_pages", "stage"):
+        pages = discover_pages(dir_path_content, dest_dir_path)
+    page_templates = [
+        select_template(template_path, layouts_dir, dir_path_content, source_path)
+        for source_path, _ in pages
+    ]
+    if manifest is not None:
+        stale_pages = []
+        stale_templates = []
+        for (source_path, dest_path), page_template in zip(pages, page_templates):
+            record = _page_record(manifest, basepath, source_path, page_template)
+            # A page missing from the site index is rendered to fill it in
+            if manifest.is_fresh(dest_path, record) and (
+                site_index is None
+                or site_index.keep(page_index_key(dir_path_content, source_path))
+            ):
+                print(f"Skipping unchanged page: {dest_path}")
+                manifest.reuse_previous(dest_path)
+            else:
+                stale_pages.append((source_path, dest_path))
+                stale_templates.append(page_template)
+            manifest.record(dest_path, record)
+        pages = stale_pages
+        page_templates = stale_templates
+
+    infos = generate_pages(basepath, pages, page_templates, jobs)
+    if site_index is not None:
+        for (source_path, dest_path), info in zip(pages, infos):
+            site_index.update(
+                page_index_key(dir_path_content, source_path),
+                page_entry(page_url(dest_dir_path, dest_path), info),
+                info.get("terms"),
             )
+
+
+def page_index_key(dir_path_content, source_path):
+    relative_path = os.path.relpath(source_path, dir_path_content)
+    return relative_path.replace(os.sep, "/")
+
+
+def page_terms(dir_path_content, key):
+    # Search terms of a page the build did not render, read from its source
+    info = PageInfo()
+    with open(os.path.join(dir_path_content, key)) as f:
+        markdown_to_html_node(f.read(), info)
+    return info.terms
+
+
+def _page_record(manifest, basepath, source_path, template_path):
+    url_resolver.set_basepath(basepath)
+    dependencies = load_template(template_path, basepath).dependencies
+    record = manifest.page_record(basepath, source_path, [source_path] + dependencies)
+    # A newer renderer can change the HTML for the same inputs
+    record["renderer"] = RENDERER_VERSION
+    variant = render_variant()
+    if variant:
+        # Fingerprinted asset URLs, basepath, minification and image
+        # attributes are baked into the page
+        record["render"] = variant
+    return record
+
+
+def page_dest_path(dir_path_content, dest_dir_path, source_path):
+    relative_path = os.path.relpath(source_path, dir_path_content)
+    parts = [part.replace(".md", ".html") for part in relative_path.split(os.sep)]
+    return os.path.join(dest_dir_path, *parts)
+
+
+def regenerate_page(
+    basepath,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    source_path,
+    manifest,
+    layouts_dir=None,
+    site_index=None,
+):
+    dest_path = page_dest_path(dir_path_content, dest_dir_path, source_path)
+    page_template = select_template(
+        template_path, layouts_dir, dir_path_content, source_path
+    )
+    record = _page_record(manifest, basepath, source_path, page_template)
+    info = generate_page(basepath, source_path, page_template, dest_path)
+    manifest.record(dest_path, record)
+    if site_index is not None:
+        site_index.update(
+            page_index_key(dir_path_content, source_path),
+            page_entry(page_url(dest_dir_path, dest_path), info),
+            info.get("terms"),
+        )
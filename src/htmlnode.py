@@ -1,7 +1,11 @@
 import html
+from src.minify import PRESERVE_TAGS, attribute_value, minify_text
+
+SELF_CLOSING_TAGS = frozenset(["img", "br", "hr", "input", "meta", "link"])
 
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
 
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
@@ -14,16 +18,62 @@ class HTMLNode:
             f"HTMLNode({self.tag!r}, {self.value!r}, {self.children!r}, {self.props!r})"
         )
 
-    def to_html(self):
+    def to_html(self, minify=False):
         raise NotImplementedError()
 
-    def props_to_html(self):
+    def iter_html(self, minify=False):
+        # Walks the tree with an explicit stack instead of recursion, so deep
+        # trees cannot hit the recursion limit and no subtree is ever
+        # materialized as an intermediate string.
+        if minify:
+            yield from self._iter_minified_html()
+            return
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode) and node.tag not in SELF_CLOSING_TAGS:
+                yield f"<{node.tag}{node.props_to_html()}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield node.to_html()
+
+    def _iter_minified_html(self):
+        # Same walk, but whitespace is collapsed in text outside of
+        # <pre>/<code>, attribute quotes are dropped where optional and
+        # void elements lose their "/>".
+        stack = [(self, False)]
+        while stack:
+            node, preserve = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode) and node.tag not in SELF_CLOSING_TAGS:
+                yield f"<{node.tag}{node.props_to_html(True)}>"
+                stack.append((f"</{node.tag}>", preserve))
+                preserve = preserve or node.tag in PRESERVE_TAGS
+                stack.extend((child, preserve) for child in reversed(node.children))
+            else:
+                yield node.to_html(minify=not preserve)
+
+    def write_html(self, fp, minify=False):
+        fp.writelines(self.iter_html(minify))
+
+    def props_to_html(self, minify=False):
         if self.props is None:
             return ""
+        if minify:
+            return "".join(
+                f" {k}={attribute_value(html.escape(str(v)))}"
+                for k, v in self.props.items()
+            )
         return "".join(f' {k}="{html.escape(str(v))}"' for k, v in self.props.items())
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         if value is not None and not isinstance(value, str):
             raise ValueError(
@@ -37,19 +87,55 @@ class LeafNode(HTMLNode):
 
         super().__init__(tag, value, children=None, props=props)
 
-    def to_html(self):
+    @classmethod
+    def _trusted(cls, tag, value, props=None):
+        # Skips validation; only for callers that build nodes from values
+        # they already control, such as the markdown parser.
+        node = cls.__new__(cls)
+        node.tag = tag
+        node.value = value
+        node.children = None
+        node.props = props
+        return node
+
+    def to_html(self, minify=False):
+        if minify:
+            return self._minified_html()
+
         if self.tag is None:
             return self.value
 
-        self_closing_tags = ["img", "br", "hr", "input", "meta", "link"]
-
-        if self.tag in self_closing_tags:
+        if self.tag in SELF_CLOSING_TAGS:
             return f"<{self.tag}{self.props_to_html()} />"
         else:
             return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def _minified_html(self):
+        if self.tag is None:
+            return minify_text(self.value)
+        props = self.props_to_html(True)
+        if self.tag in SELF_CLOSING_TAGS:
+            return f"<{self.tag}{props}>"
+        value = self.value
+        if self.tag not in PRESERVE_TAGS:
+            value = minify_text(value)
+        return f"<{self.tag}{props}>{value}</{self.tag}>"
+
+
+class RawHTMLNode(LeafNode):
+    # Markup that is already serialized, such as a cached block; emitted
+    # as is whether or not the page is minified
+    __slots__ = ()
+
+    def __init__(self, value):
+        super().__init__(None, value)
+
+    def to_html(self, minify=False):
+        return self.value
+
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
 
     def __init__(self, tag, children, props=None):
         if tag is None:
@@ -63,15 +149,19 @@ class ParentNode(HTMLNode):
 
         super().__init__(tag, value=None, children=children, props=props)
 
-    def to_html(self):
-        self_closing_tags = ["img", "br", "hr", "input", "meta", "link"]
-
-        if self.tag in self_closing_tags:
+    @classmethod
+    def _trusted(cls, tag, children, props=None):
+        # Skips the per-child isinstance checks for the parser's own trees
+        node = cls.__new__(cls)
+        node.tag = tag
+        node.value = None
+        node.children = children
+        node.props = props
+        return node
+
+    def to_html(self, minify=False):
+        if self.tag in SELF_CLOSING_TAGS:
+            if minify:
+                return f"<{self.tag}{self.props_to_html(True)}>"
             return f"<{self.tag}{self.props_to_html()} />"
-        else:
-            html = f"<{self.tag}{self.props_to_html()}>"
-
-            for child in self.children:
-                html += child.to_html()
-
-            return html + f"</{self.tag}>"
+        return "".join(self.iter_html(minify))
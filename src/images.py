@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import struct
+
+_size_cache = {}
+
+
+def image_size(path):
+    # Returns (width, height) from the file header, or None for anything
+    # that is not a PNG, GIF, JPEG or WebP image. Results are cached by
+    # path and mtime, since one image is often shared by many pages.
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _size_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "rb") as f:
+            size = _read_size(f)
+    except (OSError, struct.error):
+        size = None
+    _size_cache[path] = (mtime, size)
+    return size
+
+
+def _read_size(f):
+    head = f.read(30)
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", head[6:10])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return _webp_size(head)
+    if head[:2] == b"\xff\xd8":
+        f.seek(2)
+        return _jpeg_size(f)
+    return None
+
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        (bits,) = struct.unpack("<I", head[21:25])
+        return 1 + (bits & 0x3FFF), 1 + ((bits >> 14) & 0x3FFF)
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little")
+        height = int.from_bytes(head[27:30], "little")
+        return 1 + width, 1 + height
+    return None
+
+
+# Start-of-frame markers carry the dimensions; C4, C8 and CC share the
+# range but are not frames
+_JPEG_FRAME_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _jpeg_size(f):
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        (length,) = struct.unpack(">H", f.read(2))
+        if length < 2:
+            return None
+        if marker in _JPEG_FRAME_MARKERS:
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+class ImageOptions:
+    # Extra <img> attributes: intrinsic width/height read from the files
+    # under static_dir, plus lazy loading. The sizes are collected up
+    # front so they can be part of the cache key.
+    def __init__(self):
+        self.static_dir = None
+        self.eager_first = False
+        self.sizes = {}
+        self.key = ""
+
+    @property
+    def enabled(self):
+        return self.static_dir is not None
+
+    def configure(self, static_dir, eager_first=False, sizes=None):
+        self.static_dir = static_dir
+        self.eager_first = eager_first
+        if static_dir is not None and sizes is None:
+            sizes = scan_image_sizes(static_dir)
+        self.sizes = sizes or {}
+        if static_dir is None:
+            self.key = ""
+        else:
+            data = json.dumps([eager_first, self.sizes], sort_keys=True).encode()
+            self.key = "images:" + hashlib.sha256(data).hexdigest()[:16]
+
+    def settings(self):
+        return self.static_dir, self.eager_first, self.sizes
+
+    def attributes(self, url):
+        attributes = {}
+        size = self.sizes.get(url.split("?", 1)[0].split("#", 1)[0])
+        if size is not None:
+            attributes["width"] = str(size[0])
+            attributes["height"] = str(size[1])
+        attributes["loading"] = "lazy"
+        attributes["decoding"] = "async"
+        return attributes
+
+
+def scan_image_sizes(static_dir):
+    # Maps site-root URLs such as /images/a.png to (width, height)
+    sizes = {}
+    for dir_path, dir_names, file_names in os.walk(static_dir):
+        dir_names.sort()
+        for name in sorted(file_names):
+            path = os.path.join(dir_path, name)
+            size = image_size(path)
+            if size is not None:
+                relative_path = os.path.relpath(path, static_dir)
+                sizes["/" + relative_path.replace(os.sep, "/")] = list(size)
+    return sizes
+
+
+image_options = ImageOptions()
@@ -1,18 +1,142 @@
 import re
 from src.textnode import TextType, TextNode
 
+_MARKUP_RE = re.compile(r"[\[*_`]")
 
+
+# Worst case: text_to_textnodes runs in O(n) time for n characters of
+# input, whatever the input. Every search below goes through a lookahead
+# that only moves forward, so each character is examined a bounded number
+# of times. Unbalanced brackets, thousands of links on one line and long
+# runs of _ or ** all stay linear; benchmarks/adversarial.py checks this.
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
+    # Plain text is by far the most common input
+    if _MARKUP_RE.search(text) is None:
+        return [TextNode(text, TextType.TEXT)]
+
+    nodes = []
+    position = 0
+    for start, end, node in _iter_inline_spans(text):
+        _split_delimiters_into(text, position, start, nodes)
+        nodes.append(node)
+        position = end
+    _split_delimiters_into(text, position, len(text), nodes)
+    return nodes
 
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
 
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+def _iter_inline_spans(text):
+    # Images take precedence; links are only looked for between them, the
+    # same precedence the split_nodes_image/split_nodes_link passes had.
+    position = 0
+    for start, end, alt, url in _iter_bracketed(text, "![", 0, len(text)):
+        for link_start, link_end, anchor, href in _iter_bracketed(
+            text, "[", position, start
+        ):
+            yield link_start, link_end, TextNode(anchor, TextType.LINK, href)
+        yield start, end, TextNode(alt, TextType.IMAGE, url)
+        position = end
+    for link_start, link_end, anchor, href in _iter_bracketed(
+        text, "[", position, len(text)
+    ):
+        yield link_start, link_end, TextNode(anchor, TextType.LINK, href)
+
+
+class _Lookahead:
+    # Caches the next occurrence of a needle; valid as long as the callers'
+    # positions never move backwards.
+    __slots__ = ("text", "needle", "end", "found")
+
+    def __init__(self, text, needle, end):
+        self.text = text
+        self.needle = needle
+        self.end = end
+        self.found = -2
+
+    def find(self, position):
+        if self.found != -1 and self.found < position:
+            self.found = self.text.find(self.needle, position, self.end)
+        return self.found
+
+
+def _iter_bracketed(text, opener, start, end):
+    # Yields (start, end, text, url) for each opener + "[text](url)" in
+    # text[start:end], exactly the matches re.finditer would give for
+    # r"\[(.*?)\]\((.*?)\)" (with a leading "!" for images), but in linear
+    # time. That regex retries from every "[" and can rescan the rest of
+    # the line each time.
+    #
+    # A match at i uses the first "](" after the opener and the first ")"
+    # after that, and neither part may contain a newline. If either part
+    # fails, every opener before the offending newline fails the same way,
+    # so the scan can jump past it.
+    closes = _Lookahead(text, "](", end)
+    parens = _Lookahead(text, ")", end)
+    newlines = _Lookahead(text, "\n", end)
+    position = start
+    while True:
+        match_start = text.find(opener, position, end)
+        if match_start == -1:
+            return
+        text_start = match_start + len(opener)
+        close = closes.find(text_start)
+        if close == -1:
+            return
+        newline = newlines.find(text_start)
+        if newline != -1 and newline < close:
+            position = newline + 1
+            continue
+        paren = parens.find(close + 2)
+        if paren == -1:
+            return
+        newline = newlines.find(close + 2)
+        if newline != -1 and newline < paren:
+            position = newline + 1
+            continue
+        yield match_start, paren + 1, text[text_start:close], text[close + 2 : paren]
+        position = paren + 1
+
+
+def _split_delimiters_into(text, start, end, nodes):
+    # One left-to-right scan over text[start:end] that pairs delimiters the
+    # way the old **, _ then ` passes did: an _ pair cannot straddle a **,
+    # and a ` pair cannot straddle either. The next position of each
+    # delimiter is cached and only refreshed once the scan has passed it.
+    position = start
+    next_bold = text.find("**", start, end)
+    next_italic = text.find("_", start, end)
+    next_code = text.find("`", start, end)
+    while True:
+        if 0 <= next_bold < position:
+            next_bold = text.find("**", position, end)
+        if 0 <= next_italic < position:
+            next_italic = text.find("_", position, end)
+        if 0 <= next_code < position:
+            next_code = text.find("`", position, end)
+        candidates = [i for i in (next_bold, next_italic, next_code) if i >= 0]
+        if not candidates:
+            break
+        opener = min(candidates)
+
+        if opener == next_bold:
+            delimiter, text_type = "**", TextType.BOLD
+            bound = end
+        elif opener == next_italic:
+            delimiter, text_type = "_", TextType.ITALIC
+            bound = next_bold if next_bold >= 0 else end
+        else:
+            delimiter, text_type = "`", TextType.CODE
+            bound = min([i for i in (next_bold, next_italic) if i >= 0] or [end])
+        close = text.find(delimiter, opener + len(delimiter), bound)
+        if close == -1:
+            raise ValueError(f"Invalid markdown: Unpaired delimiter {delimiter}")
 
-    return nodes
+        if opener > position:
+            nodes.append(TextNode(text[position:opener], TextType.TEXT))
+        nodes.append(TextNode(text[opener + len(delimiter) : close], text_type))
+        position = close + len(delimiter)
+
+    if position < end:
+        nodes.append(TextNode(text[position:end], TextType.TEXT))
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -39,52 +163,41 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 
-def split_nodes_by_type(old_nodes, extract_func, text_wrapper, text_type):
+def _split_nodes_bracketed(old_nodes, opener, text_type):
     new_nodes = []
 
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-        elements = extract_func(node.text)
-        if len(elements) == 0:
-            new_nodes.append(node)
-            continue
-        current_text = node.text
-        for elem_text, url in elements:
-            parts = current_text.split(text_wrapper.format(elem_text, url), 1)
-
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], TextType.TEXT))
+        text = node.text
+        position = 0
+        for start, end, elem_text, url in _iter_bracketed(text, opener, 0, len(text)):
+            if start > position:
+                new_nodes.append(TextNode(text[position:start], TextType.TEXT))
             new_nodes.append(TextNode(elem_text, text_type, url))
-
-            if len(parts) > 1:
-                current_text = parts[1]
-            else:
-                current_text = ""
-        if current_text:
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
+            position = end
+        if position == 0:
+            new_nodes.append(node)
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
 
     return new_nodes
 
 
 def split_nodes_link(old_nodes):
-    return split_nodes_by_type(
-        old_nodes, extract_markdown_links, "[{}]({})", TextType.LINK
-    )
+    return _split_nodes_bracketed(old_nodes, "[", TextType.LINK)
 
 
 def split_nodes_image(old_nodes):
-    return split_nodes_by_type(
-        old_nodes, extract_markdown_images, "![{}]({})", TextType.IMAGE
-    )
+    return _split_nodes_bracketed(old_nodes, "![", TextType.IMAGE)
 
 
 def extract_markdown_images(text):
-    alt_url_pairs = re.findall(r"!\[(.*?)\]\((.*?)\)", text)
-    return alt_url_pairs
+    return [(alt, url) for _, _, alt, url in _iter_bracketed(text, "![", 0, len(text))]
 
 
 def extract_markdown_links(text):
-    link_url_pairs = re.findall(r"\[(.*?)\]\((.*?)\)", text)
-    return link_url_pairs
+    return [
+        (anchor, url) for _, _, anchor, url in _iter_bracketed(text, "[", 0, len(text))
+    ]
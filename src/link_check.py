@@ -0,0 +1,77 @@
+import json
+import os
+from urllib.parse import unquote, urljoin, urlsplit
+
+DEFAULT_REPORT_PATH = "link-report.json"
+
+
+def output_url_paths(manifest):
+    # Every file the build wrote (pages, static files, listings, sidecars),
+    # by its path under the output directory. The manifest records each of
+    # them as it is produced, so no directory walk is needed.
+    return set(manifest.entries)
+
+
+def link_target(url, page_url, basepath):
+    # Returns the output path an internal URL points at, or None for
+    # anything served from elsewhere (other hosts, mailto:, data: and the
+    # like) and for anchors within the page itself
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    if not parts.path:
+        return None
+    path = urljoin(page_url, unquote(parts.path))
+    if not path.startswith(basepath):
+        # Outside the site; kept absolute so it matches no output
+        return path
+    return path[len(basepath) :]
+
+
+def _candidates(path):
+    # What a static server would answer a request for path with
+    if path == "" or path.endswith("/"):
+        return (path + "index.html",)
+    return (path, path + "/index.html", path + ".html")
+
+
+def check_links(site_index, outputs, basepath):
+    # Resolves every link and image URL recorded in the site index against
+    # the set of output paths. Returns the report as a dict.
+    checked = 0
+    skipped = 0
+    broken = []
+    for key, entry in sorted(site_index.pages.items()):
+        page_url = basepath + entry["url"][1:]
+        for url in entry["links"]:
+            target = link_target(url, page_url, basepath)
+            if target is None:
+                skipped += 1
+                continue
+            checked += 1
+            if not any(path in outputs for path in _candidates(target)):
+                broken.append({"source": key, "page": entry["url"], "url": url})
+    return {
+        "checked": checked,
+        "skipped": skipped,
+        "broken": broken,
+    }
+
+
+def write_report(path, report):
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def print_report(path, report):
+    print(
+        f"Link check: {report['checked']} internal links, "
+        f"{len(report['broken'])} broken, {report['skipped']} not checked "
+        f"(report written to {path})"
+    )
+    for link in report["broken"]:
+        print(f"  {link['source']}: broken link {link['url']}")
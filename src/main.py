@@ -1,32 +1,489 @@
+import argparse
 import os
 import shutil
-import sys
-from src.copy_static import copy_files_recursive
-from generate_page import generate_pages_recursive
+from src.assets import fingerprint_files_recursive, write_asset_manifest
+from src.build_manifest import BuildManifest
+from src.compress import DEFAULT_MIN_SIZE, compress_outputs
+from src.copy_static import sync_file, sync_files_recursive
+from src.generate_page import (
+    generate_pages_recursive,
+    page_dest_path,
+    page_index_key,
+    page_terms,
+    regenerate_page,
+)
+from src.images import image_options
+from src.link_check import (
+    DEFAULT_REPORT_PATH,
+    check_links,
+    output_url_paths,
+    print_report,
+    write_report,
+)
+from src.minify import minifier
+from src.profiler import profiler
+from src.render_cache import block_cache, page_cache
+from src.search_index import (
+    SEARCH_DIR,
+    check_search_index,
+    search_options,
+    update_search_index,
+)
+from src.sections import DEFAULT_PAGE_SIZE, LISTED_FIELDS, generate_section
+from src.sitemap import SITEMAP_FIELDS, SITEMAP_NAME, write_sitemaps
+from src.site_index import SiteIndex
+from src.url_resolver import url_resolver
+from src.staging import carry_untracked_files, prepare_staging_dir, swap_into_place
+from src.watch import watch
 
 static_dir = "./static/"
 public_dir = "./docs/"
 content_dir = "./content"
 template_path = "./template.html"
+layouts_dir = "./layouts"
+manifest_path = "./.build_manifest.json"
+site_index_path = "./.site_index.json"
 default_basepath = "/"
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the static site")
+    parser.add_argument("basepath", nargs="?", default=default_basepath)
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete the public directory and re-render every page",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="render pages with N worker processes (0 uses every CPU)",
+    )
+    parser.add_argument(
+        "--sync",
+        choices=["mtime", "hash"],
+        default="mtime",
+        help="how to detect changed static files (size+mtime or content hash)",
+    )
+    parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="write into the public directory instead of staging and swapping",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="build-trace.json",
+        metavar="PATH",
+        help="write per-page, per-stage timings as Chrome trace-event JSON",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages to list with --profile",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="copy static files as name.<hash>.ext and rewrite references to them",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="collapse whitespace, comments and optional quotes in HTML output",
+    )
+    parser.add_argument(
+        "--image-attrs",
+        action="store_true",
+        help="add width/height from static image files and lazy loading to images",
+    )
+    parser.add_argument(
+        "--eager-first-image",
+        action="store_true",
+        help="with --image-attrs, leave the first image on each page eager",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write .gz copies of text outputs for servers with gzip_static",
+    )
+    parser.add_argument(
+        "--gzip-min-size",
+        type=int,
+        default=DEFAULT_MIN_SIZE,
+        metavar="BYTES",
+        help=f"only compress outputs of at least BYTES (default {DEFAULT_MIN_SIZE})",
+    )
+    parser.add_argument(
+        "--block-cache-mb",
+        type=float,
+        default=0,
+        metavar="MB",
+        help="reuse rendered HTML for repeated blocks, up to MB per process",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="keep rendered page content in DIR and reuse it across builds",
+    )
+    parser.add_argument(
+        "--section",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help="generate paginated listing pages and an Atom feed for content/NAME",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        metavar="N",
+        help=f"posts per listing page (default {DEFAULT_PAGE_SIZE})",
+    )
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="absolute site URL, such as https://example.com, for feed and "
+        "sitemap links",
+    )
+    parser.add_argument(
+        "--feed-author",
+        metavar="NAME",
+        help="author named in Atom feeds (defaults to the --site-url host)",
+    )
+    parser.add_argument(
+        "--sitemap",
+        action="store_true",
+        help=f"write {SITEMAP_NAME}, split into a sitemap index when it gets "
+        "too large (needs --site-url)",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help=f"write a sharded client-side search index to {SEARCH_DIR}/",
+    )
+    parser.add_argument(
+        "--check-links",
+        nargs="?",
+        const=DEFAULT_REPORT_PATH,
+        metavar="PATH",
+        help="check internal links and images against the build output and "
+        f"write a JSON report (default {DEFAULT_REPORT_PATH}); exits 1 if any "
+        "are broken",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild changed pages and static files until interrupted",
+    )
+    args = parser.parse_args()
+    if args.sitemap and not args.site_url:
+        parser.error("--sitemap needs --site-url, since sitemaps list full URLs")
+    if args.section and not args.site_url:
+        parser.error("--section needs --site-url, since feeds list full URLs")
+    return args
+
+
+def sync_static(args, manifest):
+    with profiler.span("sync_static", "stage"):
+        if not args.fingerprint:
+            sync_files_recursive(static_dir, manifest.output_dir, manifest, args.sync)
+            return
+        assets = fingerprint_files_recursive(
+            static_dir, manifest.output_dir, manifest, args.sync
+        )
+        write_asset_manifest(manifest.output_dir, assets, manifest)
+        url_resolver.configure(assets)
+
+
+def build(args, manifest, site_index, jobs):
+    sync_static(args, manifest)
+    if args.search:
+        check_search_index(site_index, manifest)
+
+    generate_pages_recursive(
+        args.basepath,
+        content_dir,
+        template_path,
+        manifest.output_dir,
+        manifest,
+        jobs,
+        layouts_dir,
+        site_index,
+    )
+    site_index.remove_unseen()
+    listing_urls = sections_stage(args, manifest, site_index)
+    search_stage(args, manifest, site_index)
+    sitemap_stage(args, manifest, site_index, listing_urls)
+    compress_stage(args, manifest, jobs)
+    manifest.remove_stale()
+
+
+def sections_stage(args, manifest, site_index):
+    # Built from the site index alone, so no post is read again. Returns
+    # the URLs of the listing pages.
+    listing_urls = []
+    with profiler.span("sections", "stage"):
+        for section in args.section:
+            listing_urls += generate_section(
+                section,
+                site_index,
+                manifest,
+                template_path,
+                args.basepath,
+                args.page_size,
+                args.site_url,
+                content_dir,
+                args.feed_author,
+            )
+    return listing_urls
+
+
+def sitemap_stage(args, manifest, site_index, listing_urls):
+    if not args.sitemap:
+        return
+    with profiler.span("sitemap", "stage"):
+        base_url = args.site_url.rstrip("/") + args.basepath
+        write_sitemaps(site_index, content_dir, manifest, base_url, listing_urls)
+
+
+def search_stage(args, manifest, site_index):
+    if not args.search:
+        # Search data would go stale while the index is not being written
+        site_index.take_changes()
+        site_index.drop_field("search")
+        return
+    with profiler.span("search_index", "stage"):
+        update_search_index(
+            site_index,
+            manifest,
+            args.basepath,
+            lambda key: page_terms(content_dir, key),
+        )
+
+
+def link_check_stage(args, manifest, site_index):
+    # Returns the number of broken links
+    if not args.check_links:
+        return 0
+    with profiler.span("check_links", "stage"):
+        outputs = output_url_paths(manifest)
+        report = check_links(site_index, outputs, args.basepath)
+        write_report(args.check_links, report)
+    print_report(args.check_links, report)
+    return len(report["broken"])
+
+
+def compress_stage(args, manifest, jobs):
+    if args.gzip:
+        with profiler.span("compress", "stage"):
+            compress_outputs(manifest, args.gzip_min_size, jobs)
+
+
+def _relative_to(path, root):
+    relative_path = os.path.relpath(path, root)
+    if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+        return None
+    return relative_path
+
+
+def rebuild_changed(args, manifest, site_index, jobs, changed, removed):
+    # Sources may have changed since they were hashed
+    manifest.hashes.clear()
+    # Only outputs recorded by this rebuild are compressed again
+    manifest.seen.clear()
+    paths = sorted(changed | removed)
+
+    # Edited pages are written before anything else, so the page being
+    # worked on is ready to reload as early as possible
+    for path in paths:
+        if _relative_to(path, content_dir) is None:
+            continue
+        if path in removed:
+            manifest.remove_output(page_dest_path(content_dir, public_dir, path))
+            site_index.remove(page_index_key(content_dir, path))
+        else:
+            regenerate_page(
+                args.basepath,
+                content_dir,
+                template_path,
+                public_dir,
+                path,
+                manifest,
+                layouts_dir,
+                site_index,
+            )
+
+    templates_changed = False
+    assets_changed = False
+    for path in paths:
+        static_path = _relative_to(path, static_dir)
+        if static_path is None:
+            if _relative_to(path, content_dir) is None:
+                templates_changed = True
+        elif args.fingerprint:
+            # A new hash renames the asset and changes every page using it
+            old_url = "/" + static_path.replace(os.sep, "/")
+            old_asset = url_resolver.assets.get(old_url)
+            if old_asset is not None:
+                manifest.remove_output(os.path.join(public_dir, old_asset[1:]))
+            assets_changed = True
+        else:
+            dest_path = os.path.join(public_dir, static_path)
+            if path in removed:
+                manifest.remove_output(dest_path)
+            else:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                sync_file(path, dest_path, manifest, args.sync)
+
+    if assets_changed:
+        sync_static(args, manifest)
+
+    static_changed = any(
+        _relative_to(path, static_dir) is not None for path in changed | removed
+    )
+    if image_options.enabled and static_changed:
+        # Image sizes are baked into pages like fingerprinted URLs are
+        previous_key = image_options.key
+        image_options.configure(static_dir, image_options.eager_first)
+        templates_changed = templates_changed or image_options.key != previous_key
+
+    # A lost search shard means every page has to be indexed again
+    search_lost = args.search and not check_search_index(site_index, manifest)
+
+    # A template, layout or partial changed; the manifest re-renders only
+    # the pages that depend on it. Without search data, every page is.
+    if templates_changed or assets_changed or search_lost:
+        generate_pages_recursive(
+            args.basepath,
+            content_dir,
+            template_path,
+            public_dir,
+            manifest,
+            jobs,
+            layouts_dir,
+            site_index,
+        )
+
+    # Site-wide stages only run when an entry field they read has changed
+    fields = site_index.changed_fields()
+    listings_changed = templates_changed or assets_changed
+    listings_changed = listings_changed or not fields.isdisjoint(LISTED_FIELDS)
+    listings_changed = listings_changed or "draft" in fields
+    sitemap_changed = args.sitemap and _sitemap_changed(site_index, fields)
+    if listings_changed or sitemap_changed:
+        listing_urls = sections_stage(args, manifest, site_index)
+    if site_index.previous:
+        search_stage(args, manifest, site_index)
+    if sitemap_changed:
+        sitemap_stage(args, manifest, site_index, listing_urls)
+    compress_stage(args, manifest, jobs)
+
+
+def _sitemap_changed(site_index, fields):
+    if not fields.isdisjoint(SITEMAP_FIELDS):
+        return True
+    # Undated pages use their source's mtime, which every edit changes
+    for key in site_index.previous:
+        entry = site_index.pages.get(key)
+        if entry is not None and not (entry["updated"] or entry["date"]):
+            return True
+    return False
+
+
+def finish_rebuild(args, manifest, site_index):
+    # Run once a rebuild has been reported, off the path to fresh output
+    manifest.save()
+    site_index.save()
+    link_check_stage(args, manifest, site_index)
+
+
 def main():
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+    args = parse_args()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    if args.profile:
+        profiler.enable()
+    minifier.configure(args.minify)
+    search_options.configure(args.search)
+
+    if args.image_attrs:
+        image_options.configure(static_dir, args.eager_first_image)
+    if args.block_cache_mb > 0:
+        block_cache.configure(int(args.block_cache_mb * 1024 * 1024))
+    if args.cache_dir:
+        page_cache.configure(args.cache_dir)
 
     print("Checking for static files...")
     if not os.path.exists(static_dir):
         raise Exception('"Static" directory not found in project root')
-    print("Deleting public directory...")
 
-    if os.path.exists(public_dir):
-        shutil.rmtree(public_dir)
+    if args.clean:
+        site_index = SiteIndex(site_index_path)
+    else:
+        site_index = SiteIndex.load(site_index_path)
+    if args.search:
+        # Pages indexed before search was turned on are rendered again
+        site_index.required = ("search",)
+
+    if args.in_place:
+        if args.clean:
+            manifest = BuildManifest(manifest_path, public_dir)
+        else:
+            manifest = BuildManifest.load(manifest_path, public_dir)
+        if not manifest.loaded:
+            # Without a manifest, old files in the public directory could
+            # never be told apart from this build's and removed
+            print("Deleting public directory...")
+            if os.path.exists(public_dir):
+                shutil.rmtree(public_dir)
+        build(args, manifest, site_index, jobs)
+    else:
+        # Build next to the live output and swap it in once complete, so the
+        # public directory is never empty or half-written.
+        staging_dir = prepare_staging_dir(public_dir)
+        if args.clean:
+            manifest = BuildManifest(manifest_path, staging_dir)
+        else:
+            manifest = BuildManifest.load(manifest_path, staging_dir, public_dir)
+        build(args, manifest, site_index, jobs)
+        if not args.clean:
+            carry_untracked_files(public_dir, staging_dir, manifest)
+        swap_into_place(staging_dir, public_dir)
+        manifest.output_dir = public_dir
+        manifest.previous_dir = None
+    manifest.save()
+    site_index.save()
+    broken_links = link_check_stage(args, manifest, site_index)
 
-    copy_files_recursive(static_dir, public_dir)
+    if args.profile:
+        profiler.write_trace(args.profile)
+        profiler.print_summary(args.profile_top)
+        profiler.enabled = False
+    for cache in (page_cache, block_cache):
+        if cache.enabled:
+            cache.print_stats()
+            cache.take_stats()
 
-    generate_pages_recursive(basepath, content_dir, template_path, public_dir)
+    if args.watch:
+        try:
+            watch(
+                [content_dir, static_dir, template_path, layouts_dir],
+                lambda changed, removed: rebuild_changed(
+                    args, manifest, site_index, jobs, changed, removed
+                ),
+                after_change=lambda: finish_rebuild(args, manifest, site_index),
+            )
+        except KeyboardInterrupt:
+            print("Stopped watching")
+    elif broken_links:
+        raise SystemExit(1)
 
 
-main()
+if __name__ == "__main__":
+    main()
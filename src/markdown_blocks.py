@@ -1,8 +1,25 @@
+import re
+import time
+from contextlib import contextmanager
 from enum import Enum
-from src.htmlnode import ParentNode
+from src.front_matter import split_front_matter
+from src.htmlnode import ParentNode, RawHTMLNode
+from src.images import image_options
+from src.minify import minifier
 from src.inline_markdown import text_to_textnodes
+from src.profiler import profiler
+from src.render_cache import block_cache, block_key, cache_variant
+from src.search_index import search_options, tokenize
 from src.textnode import text_node_to_html_node, TextNode, TextType
 
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+# A line that can open a fence: the backticks and at most a language name
+_FENCE_OPEN_RE = re.compile(r"```[^\s`]*")
+
+# The PageInfo that text_to_children reports to while a page is built
+_collecting = None
+
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -13,78 +30,284 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
-def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+def iter_blocks(lines):
+    # Yields (block_type, lines) for each block, reading one line at a time
+    # so a file handle can be passed straight in. Blocks are separated by
+    # empty lines, except that a fenced code block runs to its closing ```
+    # even across blank lines.
+    fence = None
+    for gap, raw in _iter_raw_blocks(lines):
+        block = _strip_block(raw)
+        if fence is not None:
+            fence.append((gap, raw, block))
+            if any(line.endswith("```") for line in block):
+                yield from _close_fence(fence)
+                fence = None
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        if _opens_fence(block):
+            fence = [(gap, raw, block)]
+            continue
+        yield _block_type(block), block
+    if fence is not None:
+        # Never closed, so the pieces are ordinary blocks after all
+        for _, _, block in fence:
+            yield _block_type(block), block
+
+
+def _iter_raw_blocks(lines):
+    # Yields (blank lines before the block, the block's lines)
+    block = []
+    gap = 0
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if line:
+            block.append(line)
+        elif block:
+            yield gap, block
+            block = []
+            gap = 1
+        else:
+            gap += 1
+    if block:
+        yield gap, block
+
+
+def _strip_block(lines):
+    if lines[0][0].isspace() or lines[-1][-1].isspace():
+        return "\n".join(lines).strip().split("\n")
+    return lines
+
+
+def _opens_fence(block):
+    # Only a fence with no closing line of its own is continued past a
+    # blank line; anything else keeps the split it always had.
+    if not _FENCE_OPEN_RE.fullmatch(block[0]):
+        return False
+    return not any(line.endswith("```") for line in block[1:])
+
+
+def _close_fence(fence):
+    last = fence[-1][2]
+    if not last[-1].endswith("```"):
+        for _, _, block in fence:
+            yield _block_type(block), block
+        return
+    lines = []
+    for gap, raw, _ in fence:
+        if lines:
+            lines.extend([""] * gap)
+        lines.extend(raw)
+    yield BlockType.CODE, _strip_block(lines)
+
+
+def markdown_to_blocks(markdown):
+    return ["\n".join(lines) for _, lines in iter_blocks(markdown.split("\n"))]
 
 
 def block_to_block_type(block):
-    if not block:
+    return _block_type(block.split("\n"))
+
+
+def _block_type(lines):
+    first = lines[0]
+    if not first:
         return BlockType.PARAGRAPH
-    elif block.startswith("```") and block.endswith("```"):
+    elif first.startswith("```") and lines[-1].endswith("```"):
         return BlockType.CODE
-    elif block.startswith(">"):
+    elif first.startswith(">"):
         return BlockType.QUOTE
-    elif block.startswith("- "):
+    elif first.startswith("- "):
         return BlockType.UNORDERED_LIST
-    elif block[0].isdigit() and block[1] == "." and block[2] == " ":
+    elif first[0].isdigit() and first[1:3] == ". ":
         return BlockType.ORDERED_LIST
-    elif block.startswith("#"):
+    elif first.startswith("#"):
         return BlockType.HEADING
     return BlockType.PARAGRAPH
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+class PageInfo:
+    # What a page holds besides its HTML: the front matter, the first H1,
+    # the first paragraph as an excerpt, and what the inline nodes add as
+    # the blocks are built (word count, link and image URLs, and search
+    # terms while search_options is enabled),
+    # so nothing has to scan the markdown or the output a second time.
+    # Cached blocks carry their own PageInfo and are merged into the page's.
+    def __init__(self, metadata=None, title=None, word_count=0):
+        self.metadata = metadata if metadata is not None else {}
+        self.title = title
+        self.excerpt = None
+        self.word_count = word_count
+        self.terms = {}
+        self.links = []
+
+    def add_inline_nodes(self, text_nodes, html_nodes):
+        for text_node, html_node in zip(text_nodes, html_nodes):
+            if text_node.text_type == TextType.LINK:
+                self.links.append(html_node.props["href"])
+            elif text_node.text_type == TextType.IMAGE:
+                self.links.append(html_node.props["src"])
+                continue
+            self.word_count += len(text_node.text.split())
+            if search_options.enabled:
+                for term in tokenize(text_node.text):
+                    self.terms[term] = self.terms.get(term, 0) + 1
+
+    def merge(self, block_info):
+        self.word_count += block_info.word_count
+        for term, count in block_info.terms.items():
+            self.terms[term] = self.terms.get(term, 0) + count
+        self.links.extend(block_info.links)
+
+    def page_title(self):
+        # Front matter wins over the first H1
+        title = self.metadata.get("title") or self.title
+        if title is None:
+            raise ValueError("No H1 found in markdown")
+        return str(title)
+
+    def to_dict(self):
+        data = {
+            "metadata": self.metadata,
+            "title": self.page_title(),
+            "excerpt": self.excerpt,
+            "word_count": self.word_count,
+            "links": list(dict.fromkeys(self.links)),
+        }
+        if search_options.enabled:
+            data["terms"] = self.terms
+        return data
+
+    def load(self, data):
+        # Restores what to_dict() saved, for pages served from a cache
+        self.metadata = data["metadata"]
+        self.title = data["title"]
+        self.excerpt = data["excerpt"]
+        self.word_count = data["word_count"]
+        self.terms = data.get("terms", {})
+        self.links = data["links"]
+
+
+@contextmanager
+def _collect(info):
+    global _collecting
+    outer = _collecting
+    _collecting = info
+    try:
+        yield info
+    finally:
+        _collecting = outer
+
+
+def markdown_to_html_node(markdown, info=None):
+    # Accepts the markdown as a string or as an iterable of lines. Front
+    # matter, the title and word count are collected into info if given.
+    if isinstance(markdown, str):
+        markdown = markdown.split("\n")
+    metadata, markdown = split_front_matter(markdown)
+    if info is None:
+        info = PageInfo()
+    info.metadata = metadata
+    blocks = iter_blocks(markdown)
+    if profiler.enabled:
+        with profiler.span("markdown_to_blocks", "stage"):
+            blocks = list(blocks)
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    with profiler.span("block_to_html_node", "stage") as span, _collect(info):
+        eager_pending = image_options.enabled and image_options.eager_first
+        for block_type, lines in blocks:
+            if info.title is None and block_type is BlockType.HEADING:
+                info.title = h1_text(lines[0])
+            if eager_pending and any("![" in line for line in lines):
+                # Built outside the block cache, since being first on the
+                # page changes its output
+                node = _BLOCK_BUILDERS[block_type](lines)
+                eager_pending = not _load_first_image_eagerly(node)
+            elif block_cache.enabled:
+                node = _cached_block_node(block_type, lines, info)
+            else:
+                node = _BLOCK_BUILDERS[block_type](lines)
+            if info.excerpt is None and block_type is BlockType.PARAGRAPH:
+                info.excerpt = node.to_html(minifier.enabled)
+            children.append(node)
+        if profiler.enabled:
+            inline_ns = profiler.take_totals().get("text_to_textnodes", 0)
+            span.args["text_to_textnodes_us"] = inline_ns / 1000
     return ParentNode("div", children, None)
 
 
+def h1_text(line):
+    # "# Title" gives "Title"; deeper headings give None
+    if line[1:2].isspace():
+        return line[1:].strip()
+    return None
+
+
+def _load_first_image_eagerly(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.tag == "img":
+            node.props.pop("loading", None)
+            return True
+        if node.children:
+            stack.extend(reversed(node.children))
+    return False
+
+
+def _cached_block_node(block_type, lines, info):
+    # Repeated blocks (disclaimers, bios, shared lists) are parsed and
+    # serialized once and come back as a raw HTML leaf afterwards, along
+    # with what they add to the page's PageInfo
+    key = block_key(block_type, lines, cache_variant())
+    cached = block_cache.get(key)
+    if cached is None:
+        with _collect(PageInfo()) as block_info:
+            html = _BLOCK_BUILDERS[block_type](lines).to_html(minifier.enabled)
+        cached = (html, block_info)
+        block_cache.put(key, cached)
+    html, block_info = cached
+    info.merge(block_info)
+    return RawHTMLNode(html)
+
+
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    match block_type:
-        case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
-        case BlockType.HEADING:
-            return heading_to_html_node(block)
-        case BlockType.CODE:
-            return code_to_html_node(block)
-        case BlockType.QUOTE:
-            return quote_to_html_node(block)
-        case BlockType.UNORDERED_LIST:
-            return ul_to_html_node(block)
-        case BlockType.ORDERED_LIST:
-            return ol_to_html_node(block)
-        case _:
-            raise ValueError("invalid block type")
+    lines = block.split("\n")
+    return _BLOCK_BUILDERS[_block_type(lines)](lines)
 
 
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+    if profiler.enabled:
+        start = time.perf_counter_ns()
+        text_nodes = text_to_textnodes(text)
+        profiler.add_time("text_to_textnodes", time.perf_counter_ns() - start)
+    else:
+        text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
         html_node = text_node_to_html_node(text_node)
         children.append(html_node)
+    if _collecting is not None:
+        _collecting.add_inline_nodes(text_nodes, children)
     return children
 
 
 def paragraph_to_html_node(block):
-    lines = block.split("\n")
+    return _paragraph_node(block.split("\n"))
+
+
+def _paragraph_node(lines):
     paragraph = " ".join(lines)
     children = text_to_children(paragraph)
-    return ParentNode("p", children)
+    return ParentNode._trusted("p", children)
 
 
 def heading_to_html_node(block):
+    return _heading_node(block.split("\n"))
+
+
+def _heading_node(lines):
+    block = "\n".join(lines)
     level = 0
     for char in block:
         if char == "#":
@@ -95,41 +318,61 @@ def heading_to_html_node(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
     children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    if level <= len(HEADING_TAGS):
+        return ParentNode._trusted(HEADING_TAGS[level - 1], children)
+    return ParentNode._trusted(f"h{level}", children)
 
 
 def code_to_html_node(block):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid block type")
-    text = block[4:-3]
+    return _code_node(block.split("\n"))
+
+
+def _code_node(lines):
+    # The opening line holds only the backticks and an optional language,
+    # and the closing backticks end the last line
+    if len(lines) == 1:
+        text = lines[0][4:-3]
+    else:
+        text = "\n".join(lines[1:])[:-3]
     raw_text_node = TextNode(text, TextType.TEXT)
     child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
-    return ParentNode("pre", [code])
+    code = ParentNode._trusted("code", [child])
+    return ParentNode._trusted("pre", [code])
 
 
 def ol_to_html_node(block):
-    items = block.split("\n")
+    return _ol_node(block.split("\n"))
+
+
+def _ol_node(lines):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[3:]
         children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ol", html_items)
+        html_items.append(ParentNode._trusted("li", children))
+    return ParentNode._trusted("ol", html_items)
 
 
 def ul_to_html_node(block):
-    items = block.split("\n")
+    return _ul_node(block.split("\n"))
+
+
+def _ul_node(lines):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[2:]
         children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ul", html_items)
+        html_items.append(ParentNode._trusted("li", children))
+    return ParentNode._trusted("ul", html_items)
 
 
 def quote_to_html_node(block):
-    lines = block.split("\n")
+    return _quote_node(block.split("\n"))
+
+
+def _quote_node(lines):
     new_lines = []
     for line in lines:
         line = line.strip()
@@ -138,4 +381,14 @@ def quote_to_html_node(block):
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
     children = text_to_children(content)
-    return ParentNode("blockquote", children)
+    return ParentNode._trusted("blockquote", children)
+
+
+_BLOCK_BUILDERS = {
+    BlockType.PARAGRAPH: _paragraph_node,
+    BlockType.HEADING: _heading_node,
+    BlockType.CODE: _code_node,
+    BlockType.QUOTE: _quote_node,
+    BlockType.UNORDERED_LIST: _ul_node,
+    BlockType.ORDERED_LIST: _ol_node,
+}
@@ -0,0 +1,66 @@
+import re
+
+# Content of these elements is whitespace-sensitive or not HTML at all
+PRESERVE_TAGS = frozenset(["pre", "code", "textarea", "script", "style"])
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_BETWEEN_TAGS_RE = re.compile(r">\s+<")
+_START_TAG_RE = re.compile(r"<[A-Za-z][^>]*>")
+_SELF_CLOSING_RE = re.compile(r"\s+/>$")
+_QUOTED_ATTR_RE = re.compile(r'(\s[\w:-]+)="([^\s"\'=<>`]+)"')
+_PRESERVED_RE = re.compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+_UNQUOTED_VALUE_RE = re.compile(r"[^\s\"'=<>`]+")
+
+
+class Minifier:
+    def __init__(self):
+        self.enabled = False
+
+    def configure(self, enabled):
+        self.enabled = enabled
+
+    @property
+    def key(self):
+        # Mixed into cache keys, like UrlResolver.key
+        return "minify" if self.enabled else ""
+
+
+def minify_text(text):
+    # Text between tags, outside of any preserved element
+    return _WHITESPACE_RE.sub(" ", _COMMENT_RE.sub("", text))
+
+
+def attribute_value(value):
+    # Quotes are optional when the value has no whitespace or delimiters
+    if _UNQUOTED_VALUE_RE.fullmatch(value):
+        return value
+    return f'"{value}"'
+
+
+def minify_markup(html):
+    # For markup that is not built from nodes, such as template text, which
+    # is minified once when the template is compiled.
+    parts = _PRESERVED_RE.split(html)
+    result = []
+    # split() returns text, then the preserved element and its tag name
+    for i in range(0, len(parts), 3):
+        text = _BETWEEN_TAGS_RE.sub("><", _COMMENT_RE.sub("", parts[i]))
+        text = _START_TAG_RE.sub(
+            lambda tag: _minify_start_tag(tag.group(0)),
+            _WHITESPACE_RE.sub(" ", text),
+        )
+        result.append(text)
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return "".join(result)
+
+
+def _minify_start_tag(tag):
+    tag = _QUOTED_ATTR_RE.sub(r"\1=\2", tag)
+    return _SELF_CLOSING_RE.sub(">", tag)
+
+
+minifier = Minifier()
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_DONE = object()
+
+
+class _Span:
+    def __init__(self, profiler, name, category, args):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.profiler.events.append(
+            {
+                "name": self.name,
+                "cat": self.category,
+                "ph": "X",
+                "ts": self.start / 1000,
+                "dur": (end - self.start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": self.args,
+            }
+        )
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.totals = {}
+        # Time spent in nested iter_span generators, one counter per level
+        self._iter_nested = []
+
+    def enable(self):
+        self.enabled = True
+
+    def span(self, name, category="build", **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def iter_span(self, name, chunks, category="stage", **args):
+        # Streamed output is produced piece by piece as it is written, so a
+        # plain span can't surround it. This records one event per
+        # generator instead, timing only its own work between chunks and
+        # leaving out any iter_span generator it pulls from.
+        if not self.enabled:
+            return chunks
+        return self._iter_span(name, iter(chunks), category, args)
+
+    def _iter_span(self, name, chunks, category, args):
+        start = None
+        elapsed = 0
+        while True:
+            self._iter_nested.append(0)
+            before = time.perf_counter_ns()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                chunk = _DONE
+            after = time.perf_counter_ns()
+            nested = self._iter_nested.pop()
+            if self._iter_nested:
+                self._iter_nested[-1] += after - before
+            elapsed += after - before - nested
+            if start is None:
+                start = before
+            if chunk is _DONE:
+                break
+            yield chunk
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": elapsed / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    def add_time(self, stage, elapsed_ns):
+        # Hot inner stages are summed rather than traced per call, which
+        # would produce millions of events on a large site.
+        self.totals[stage] = self.totals.get(stage, 0) + elapsed_ns
+
+    def take_totals(self):
+        totals = self.totals
+        self.totals = {}
+        return totals
+
+    def take_events(self):
+        events = self.events
+        self.events = []
+        return events
+
+    def stage_totals(self):
+        totals = {}
+        for event in self.events:
+            if event["cat"] == "stage":
+                totals[event["name"]] = totals.get(event["name"], 0) + event["dur"]
+            for key, value in event["args"].items():
+                if key.endswith("_us"):
+                    stage = key[: -len("_us")]
+                    totals[stage] = totals.get(stage, 0) + value
+        return totals
+
+    def slowest_pages(self, top_n=10):
+        pages = [event for event in self.events if event["name"] == "page"]
+        pages.sort(key=lambda event: event["dur"], reverse=True)
+        return pages[:top_n]
+
+    def write_trace(self, path):
+        events = sorted(self.events, key=lambda event: (event["pid"], event["ts"]))
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"Wrote {len(events)} trace events to {path}")
+
+    def print_summary(self, top_n=10):
+        print("Time per stage:")
+        totals = self.stage_totals()
+        for stage, total_us in sorted(totals.items(), key=lambda item: -item[1]):
+            print(f"  {stage:<24} {total_us / 1000:10.2f} ms")
+        print(f"Slowest {top_n} pages:")
+        for event in self.slowest_pages(top_n):
+            print(f"  {event['dur'] / 1000:10.2f} ms  {event['args']['path']}")
+
+
+profiler = Profiler()
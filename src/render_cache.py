@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+from src.images import image_options
+from src.minify import minifier
+from src.search_index import search_options
+from src.url_resolver import url_resolver
+
+# Bump whenever a change to the markdown renderer alters its output, so
+# persistent cache entries written by older code are never served.
+RENDERER_VERSION = 6
+
+
+def render_variant():
+    # Settings that change the output for the same markdown; anything that
+    # caches rendered output is keyed on this as well
+    keys = (url_resolver.key, minifier.key, image_options.key)
+    return "|".join(key for key in keys if key)
+
+
+def cache_variant():
+    # Cached entries also hold the PageInfo, whose search terms depend on
+    # whether the search index is being written
+    keys = (render_variant(), search_options.key)
+    return "|".join(key for key in keys if key)
+
+
+def block_key(block_type, lines, variant=""):
+    # variant covers render settings that change the output for the same
+    # text, such as the asset URL mapping
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{variant}\n{block_type.value}".encode())
+    for line in lines:
+        digest.update(b"\n")
+        digest.update(line.encode())
+    return digest.digest()
+
+
+class _CacheCounters:
+    COUNTERS = ("hits", "misses")
+    LABEL = "Cache"
+
+    def take_stats(self):
+        stats = {name: getattr(self, name) for name in self.COUNTERS}
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        return stats
+
+    def add_stats(self, stats):
+        # Counters from worker processes are folded into the parent's
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + stats[name])
+
+    def print_stats(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0
+        extra = "".join(f", {getattr(self, name)} {name}" for name in self.COUNTERS[2:])
+        print(
+            f"{self.LABEL}: {self.hits} hits, {self.misses} misses "
+            f"({rate:.0%} hit rate){extra}"
+        )
+
+
+class BlockCache(_CacheCounters):
+    # Serialized HTML for blocks seen before, keyed by a hash of the block
+    # text. Least recently used entries are evicted once the cache holds
+    # more than max_bytes.
+    COUNTERS = ("hits", "misses", "evictions")
+    LABEL = "Block cache"
+
+    def __init__(self, max_bytes=0):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def configure(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        # Entries are stored with their size, measured once here
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+        self.entries[key] = (value, size)
+        self.size += size
+        self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes and self.entries:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+
+def _entry_size(key, value):
+    return sys.getsizeof(key) + _deep_size(value)
+
+
+def _deep_size(value):
+    # Blocks are cached as (html, PageInfo) pairs, and the PageInfo's terms
+    # and links can outweigh the HTML itself
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_size(item) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += _deep_size(vars(value))
+    return size
+
+
+class PageCache(_CacheCounters):
+    # Rendered page content and its PageInfo on disk, addressed by a hash of the
+    # markdown and RENDERER_VERSION. Entries are written atomically, so
+    # parallel workers and separate builds can share one directory, and
+    # it can be saved and restored between CI jobs as is.
+    LABEL = "Page cache"
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    def configure(self, directory):
+        self.directory = directory
+
+    def entry_path(self, markdown, variant=""):
+        digest = hashlib.sha256(f"{RENDERER_VERSION}\n{variant}\n{markdown}".encode())
+        key = digest.hexdigest()
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, markdown, variant=""):
+        try:
+            with open(self.entry_path(markdown, variant)) as f:
+                entry = json.load(f)
+            info, html = entry["info"], entry["html"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return info, html
+
+    def put(self, markdown, info, html, variant=""):
+        path = self.entry_path(markdown, variant)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"info": info, "html": html}, f)
+        os.replace(tmp_path, path)
+
+
+block_cache = BlockCache()
+page_cache = PageCache()
@@ -0,0 +1,206 @@
+import json
+import os
+import re
+
+SEARCH_DIR = "search"
+DOCS_NAME = "docs.json"
+PREFIX_LENGTH = 2
+# Shard for terms whose prefix is not plain ASCII letters and digits
+OTHER_SHARD = "_"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class SearchOptions:
+    # Search terms are only collected while pages are built when the index
+    # is written; tokenizing every text node costs a good share of the
+    # inline rendering time otherwise
+    def __init__(self):
+        self.enabled = False
+
+    def configure(self, enabled):
+        self.enabled = enabled
+
+    @property
+    def key(self):
+        # Mixed into the keys of caches that hold a PageInfo
+        return "search" if self.enabled else ""
+
+
+search_options = SearchOptions()
+
+
+def tokenize(text):
+    # Lowercased words of two characters or more, as the browser side
+    # should split a query
+    return [token for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def shard_name(term):
+    prefix = term[:PREFIX_LENGTH]
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return OTHER_SHARD
+
+
+class _UnreadableShard(Exception):
+    pass
+
+
+def check_search_index(site_index, manifest):
+    # Run before pages are rendered. The index is patched rather than
+    # rebuilt, so every shard the site index refers to has to be in the
+    # previous output; if one is gone, the search data is dropped and this
+    # build renders every page again to write the index from scratch.
+    # Returns False in that case.
+    search_dir = os.path.join(manifest.output_dir, SEARCH_DIR)
+    shards = set()
+    for entry in site_index.pages.values():
+        if "search" in entry:
+            shards.update(entry["search"]["shards"])
+    for shard in sorted(shards):
+        path = manifest.previous_path(os.path.join(search_dir, shard + ".json"))
+        if not os.path.isfile(path):
+            print(f"Search shard missing: {path}")
+            print("Rendering every page again to rebuild the search index")
+            site_index.drop_field("search")
+            return False
+    return True
+
+
+def update_search_index(site_index, manifest, basepath, read_terms):
+    # Writes search/docs.json (id -> [url, title]) and one search/<prefix>.json
+    # per shard (term -> [[id, count], ...]). Each site index entry records
+    # its document id and the shards holding its terms, so only the shards
+    # of pages rendered or removed in this build are read back from the
+    # previous output, patched and written; the rest are reused as is.
+    # If a previous shard cannot be read, read_terms(key) supplies the terms
+    # of each page not rendered in this build and the whole index is
+    # written again, so a partial index is never left behind.
+    previous, terms = site_index.take_changes()
+    search_dir = os.path.join(manifest.output_dir, SEARCH_DIR)
+    written = set()
+    rebuilt = False
+    try:
+        _update_shards(site_index, manifest, search_dir, previous, terms, written)
+    except _UnreadableShard as e:
+        print(f"Search shard missing or unreadable: {e}")
+        print("Rebuilding the search index from every page")
+        for key, entry in site_index.pages.items():
+            if key not in terms:
+                terms[key] = {} if entry["draft"] else read_terms(key)
+        site_index.drop_field("search")
+        shards = set()
+        _update_shards(site_index, manifest, search_dir, {}, terms, shards)
+        for shard in sorted(written - shards):
+            manifest.remove_output(os.path.join(search_dir, shard + ".json"))
+        rebuilt = True
+
+    dest_path = os.path.join(search_dir, DOCS_NAME)
+    record = {"source": "search", "basepath": basepath}
+    if rebuilt or previous or not manifest.is_fresh(dest_path, record):
+        docs = {
+            entry["search"]["id"]: [basepath + entry["url"][1:], entry["title"]]
+            for entry in site_index.pages.values()
+            if not entry["draft"]
+        }
+        data = {"prefix_length": PREFIX_LENGTH, "docs": dict(sorted(docs.items()))}
+        _write_json(dest_path, data)
+    else:
+        manifest.reuse_previous(dest_path)
+    manifest.record(dest_path, record)
+
+
+def _update_shards(site_index, manifest, search_dir, previous, terms, written):
+    # Adds the name of every shard written or reused to written, and raises
+    # _UnreadableShard if one that has to be patched cannot be read
+    # Shards the previous build wrote, and those whose postings change
+    existing = set()
+    touched = set()
+    stale_ids = set()
+    for key, entry in site_index.pages.items():
+        if key not in terms and "search" in entry:
+            existing.update(entry["search"]["shards"])
+    for entry in previous.values():
+        if entry is not None and "search" in entry:
+            stale_ids.add(entry["search"]["id"])
+            touched.update(entry["search"]["shards"])
+    existing.update(touched)
+
+    ids = [
+        entry["search"]["id"]
+        for entry in site_index.pages.values()
+        if "search" in entry
+    ]
+    next_id = 1 + max(ids + list(stale_ids), default=-1)
+    postings = {}
+    for key, page_terms in sorted(terms.items()):
+        entry = site_index.pages[key]
+        old = previous.get(key)
+        if old is not None and "search" in old:
+            doc_id = old["search"]["id"]
+        else:
+            doc_id = next_id
+            next_id += 1
+        shards = set()
+        if not entry["draft"]:
+            for term, count in page_terms.items():
+                shard = shard_name(term)
+                shards.add(shard)
+                shard_postings = postings.setdefault(shard, {})
+                shard_postings.setdefault(term, []).append([doc_id, count])
+        entry["search"] = {"id": doc_id, "shards": sorted(shards)}
+        touched.update(shards)
+
+    for shard in sorted(existing | touched):
+        dest_path = os.path.join(search_dir, shard + ".json")
+        previous_path = manifest.previous_path(dest_path)
+        record = {"source": "search", "shard": shard}
+        if shard in existing and not os.path.isfile(previous_path):
+            raise _UnreadableShard(previous_path)
+        if shard not in touched:
+            manifest.reuse_previous(dest_path)
+            manifest.record(dest_path, record)
+            written.add(shard)
+            continue
+        index = _read_shard(previous_path, stale_ids) if shard in existing else {}
+        if index is None:
+            raise _UnreadableShard(previous_path)
+        for term, term_postings in postings.get(shard, {}).items():
+            index.setdefault(term, []).extend(term_postings)
+        index = {term: sorted(p) for term, p in sorted(index.items()) if p}
+        if not index:
+            # Removed here rather than left to remove_stale(), which watch
+            # rebuilds never call
+            manifest.remove_output(dest_path)
+            continue
+        print(f"Writing search shard: {dest_path}")
+        _write_json(dest_path, index)
+        manifest.record(dest_path, record)
+        written.add(shard)
+
+
+def _read_shard(path, stale_ids):
+    # The previous shard without postings of pages that changed, or None if
+    # it cannot be read
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not stale_ids:
+        return index
+    return {
+        term: [posting for posting in term_postings if posting[0] not in stale_ids]
+        for term, term_postings in index.items()
+    }
+
+
+def _write_json(dest_path, data):
+    # Written to a new file and renamed over the old one, which may be
+    # hard-linked from the previous build's output
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, dest_path)
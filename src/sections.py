@@ -0,0 +1,255 @@
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from datetime import date
+from urllib.parse import urlsplit
+from src.generate_page import write_page
+from src.htmlnode import LeafNode, ParentNode, RawHTMLNode
+from src.minify import minifier
+from src.profiler import profiler
+from src.render_cache import RENDERER_VERSION, render_variant
+from src.template import load_template
+from src.url_resolver import url_resolver
+
+FEED_NAME = "atom.xml"
+FEED_TYPE = "application/atom+xml"
+DEFAULT_PAGE_SIZE = 10
+FEED_SIZE = 20
+
+# Entry fields shown on listing pages and in feeds; nothing else in the
+# site index makes them stale
+LISTED_FIELDS = ("url", "title", "date", "updated", "tags", "excerpt")
+# A date, then optionally a time with a timezone, such as
+# 2024-03-05T10:00:00+01:00
+_DATE_TIME_RE = re.compile(
+    r"(\d{4}-\d{2}-\d{2})"
+    r"(?:T((?:[01]\d|2[0-3]):[0-5]\d)(:[0-5]\d(?:\.\d+)?)?"
+    r"(Z|[+-](?:[01]\d|2[0-3]):[0-5]\d))?"
+)
+
+
+def section_posts(site_index, section):
+    # (key, entry) for published pages under content/<section>/, newest
+    # first. Posts without a date sort last, and ties are broken by title.
+    prefix = section.strip("/") + "/"
+    posts = [
+        (key, entry)
+        for key, entry in site_index.pages.items()
+        if key.startswith(prefix) and key != prefix + "index.md" and not entry["draft"]
+    ]
+    posts.sort(key=lambda post: post[1]["title"])
+    posts.sort(key=lambda post: post[1]["date"] or "", reverse=True)
+    return posts
+
+
+def listing_url(section, number):
+    url = "/" + section.strip("/") + "/"
+    if number == 1:
+        return url
+    return f"{url}page/{number}/"
+
+
+def generate_section(
+    section,
+    site_index,
+    manifest,
+    template_path,
+    basepath,
+    page_size=DEFAULT_PAGE_SIZE,
+    site_url=None,
+    content_dir=None,
+    author=None,
+):
+    # Writes the paginated listing for a content section and its Atom
+    # feed from the site index. Each output's record holds a digest of
+    # the posts it shows, so a page or feed is rewritten only when one of
+    # its posts was added, removed or changed its metadata. Feed entries
+    # without a date use their source's mtime under content_dir. Returns
+    # the URLs of the listing pages.
+    if section.strip("/") + "/index.md" in site_index.pages:
+        raise ValueError(f"{section}/index.md would be replaced by the listing")
+    url_resolver.set_basepath(basepath)
+    keyed_posts = section_posts(site_index, section)
+    posts = [entry for _, entry in keyed_posts]
+    template = load_template(template_path, basepath)
+    inputs = {path: manifest.file_hash(path) for path in template.dependencies}
+    chunks = [posts[i : i + page_size] for i in range(0, len(posts), page_size)]
+    chunks = chunks or [[]]
+    for number, chunk in enumerate(chunks, 1):
+        url = listing_url(section, number)
+        dest_path = os.path.join(manifest.output_dir, url[1:], "index.html")
+        record = _record(basepath, f"{section}:{number}/{len(chunks)}", chunk)
+        record["inputs"] = inputs
+        if _reuse_if_fresh(manifest, dest_path, record):
+            continue
+        print(f"Generating listing page {url} for {section}")
+        with profiler.span("listing", "page", path=url):
+            title = _section_title(section, number)
+            content = listing_node(section, chunk, number, len(chunks))
+            write_page(
+                dest_path,
+                template.iter_render(
+                    {
+                        "Title": title,
+                        "Content": lambda: content.iter_html(minifier.enabled),
+                    }
+                ),
+            )
+
+    feed_posts = [
+        (entry, _entry_updated(entry, content_dir, key))
+        for key, entry in keyed_posts[:FEED_SIZE]
+    ]
+    author = author or urlsplit(site_url or "").hostname or "Unknown"
+    dest_path = os.path.join(manifest.output_dir, section.strip("/"), FEED_NAME)
+    record = _record(basepath, f"{section}:feed", posts[:FEED_SIZE])
+    record["site_url"] = site_url
+    record["author"] = author
+    record["updated"] = [updated for _, updated in feed_posts]
+    if not _reuse_if_fresh(manifest, dest_path, record):
+        print(f"Generating feed {dest_path}")
+        write_page(dest_path, iter_feed(section, feed_posts, site_url, author))
+    return [listing_url(section, number) for number in range(1, len(chunks) + 1)]
+
+
+def _record(basepath, source, posts):
+    posts = [{field: post[field] for field in LISTED_FIELDS} for post in posts]
+    data = json.dumps(posts, sort_keys=True).encode()
+    record = {
+        "source": source,
+        "posts": hashlib.sha256(data).hexdigest(),
+        "basepath": basepath,
+        "renderer": RENDERER_VERSION,
+    }
+    variant = render_variant()
+    if variant:
+        record["render"] = variant
+    return record
+
+
+def _reuse_if_fresh(manifest, dest_path, record):
+    fresh = manifest.is_fresh(dest_path, record)
+    if fresh:
+        print(f"Skipping unchanged listing: {dest_path}")
+        manifest.reuse_previous(dest_path)
+    manifest.record(dest_path, record)
+    return fresh
+
+
+def _section_title(section, number):
+    title = section.strip("/").replace("-", " ").replace("_", " ").title()
+    if number > 1:
+        return f"{title} - Page {number}"
+    return title
+
+
+def listing_node(section, posts, number, page_count):
+    articles = []
+    for post in posts:
+        link = LeafNode(
+            "a",
+            html.escape(post["title"], quote=False),
+            {"href": url_resolver.resolve(post["url"])},
+        )
+        children = [ParentNode("h2", [link])]
+        if post["date"]:
+            time = LeafNode(
+                "time", html.escape(post["date"]), {"datetime": post["date"]}
+            )
+            children.append(ParentNode("p", [time]))
+        if post["excerpt"]:
+            children.append(RawHTMLNode(post["excerpt"]))
+        articles.append(ParentNode("article", children))
+    if not articles:
+        articles.append(LeafNode("p", "No posts yet."))
+
+    links = []
+    if number > 1:
+        href = url_resolver.resolve(listing_url(section, number - 1))
+        links.append(LeafNode("a", "Newer posts", {"href": href, "rel": "prev"}))
+    if number < page_count:
+        href = url_resolver.resolve(listing_url(section, number + 1))
+        links.append(LeafNode("a", "Older posts", {"href": href, "rel": "next"}))
+    feed_url = url_resolver.resolve(f"/{section.strip('/')}/{FEED_NAME}")
+    links.append(LeafNode("a", "Atom feed", {"href": feed_url, "type": FEED_TYPE}))
+    articles.append(ParentNode("nav", links))
+    return ParentNode("div", articles, {"class": "post-list"})
+
+
+def iter_feed(section, posts, site_url, author):
+    # Yields the Atom document in pieces, like a rendered page. posts are
+    # (entry, updated) pairs, updated being an RFC 3339 timestamp. A feed
+    # with no posts was last updated now.
+    section_url = _absolute_url(listing_url(section, 1), site_url)
+    feed_url = _absolute_url(f"/{section.strip('/')}/{FEED_NAME}", site_url)
+    updated = max((updated for _, updated in posts), default=None)
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield f"<title>{_xml(_section_title(section, 1))}</title>\n"
+    yield f'<link href="{_xml(section_url)}"/>\n'
+    yield f'<link rel="self" href="{_xml(feed_url)}"/>\n'
+    yield f"<id>{_xml(section_url)}</id>\n"
+    yield f"<updated>{updated or _timestamp(time.time())}</updated>\n"
+    yield f"<author><name>{_xml(author)}</name></author>\n"
+    for post, post_updated in posts:
+        url = _absolute_url(post["url"], site_url)
+        yield "<entry>\n"
+        yield f"<title>{_xml(post['title'])}</title>\n"
+        yield f'<link href="{_xml(url)}"/>\n'
+        yield f"<id>{_xml(url)}</id>\n"
+        yield f"<updated>{post_updated}</updated>\n"
+        published = _atom_date(post["date"])
+        if published:
+            yield f"<published>{published}</published>\n"
+        for tag in post["tags"]:
+            yield f'<category term="{_xml(tag)}"/>\n'
+        if post["excerpt"]:
+            yield f'<summary type="html">{_xml(post["excerpt"])}</summary>\n'
+        yield "</entry>\n"
+    yield "</feed>\n"
+
+
+def _absolute_url(url, site_url):
+    url = url_resolver.resolve(url)
+    if site_url and url.startswith("/"):
+        return site_url.rstrip("/") + url
+    return url
+
+
+def _entry_updated(post, content_dir, key):
+    # The front matter's updated or date, else when the source last changed
+    value = _atom_date(post["updated"]) or _atom_date(post["date"])
+    if value:
+        return value
+    try:
+        return _timestamp(os.path.getmtime(os.path.join(content_dir or "", key)))
+    except OSError:
+        return _timestamp(time.time())
+
+
+def _atom_date(value):
+    # A front matter date as RFC 3339, which Atom wants. YYYY-MM-DD is taken
+    # as midnight UTC and a date and time needs the T and a timezone;
+    # anything else gives None.
+    match = _DATE_TIME_RE.fullmatch(value or "")
+    if match is None:
+        return None
+    day, clock, seconds, zone = match.groups()
+    try:
+        date.fromisoformat(day)
+    except ValueError:
+        return None
+    if clock is None:
+        return day + "T00:00:00Z"
+    return f"{day}T{clock}{seconds or ':00'}{zone}"
+
+
+def _timestamp(seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+def _xml(text):
+    return html.escape(text)
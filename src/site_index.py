@@ -0,0 +1,136 @@
+import html
+import json
+import os
+
+SITE_INDEX_VERSION = 3
+
+
+def page_url(dest_dir_path, dest_path):
+    # Site-root URL of an output page, with index.html left off
+    relative_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if relative_path == "index.html":
+        return "/"
+    if relative_path.endswith("/index.html"):
+        return "/" + relative_path[: -len("index.html")]
+    return "/" + relative_path
+
+
+def page_entry(url, info):
+    # info is PageInfo.to_dict() for the rendered page. The excerpt is
+    # HTML: the page's first paragraph, unless the front matter has a
+    # summary.
+    metadata = info["metadata"]
+    tags = metadata.get("tags") or []
+    if not isinstance(tags, list):
+        tags = [tags]
+    excerpt = info["excerpt"] or ""
+    if metadata.get("summary") is not None:
+        excerpt = f"<p>{html.escape(str(metadata['summary']), quote=False)}</p>"
+    return {
+        "url": url,
+        "title": info["title"],
+        "date": _optional_str(metadata.get("date")),
+        "updated": _optional_str(metadata.get("updated")),
+        "tags": [str(tag) for tag in tags],
+        "draft": metadata.get("draft") is True,
+        "excerpt": excerpt,
+        "word_count": info["word_count"],
+        "links": info["links"],
+    }
+
+
+def _optional_str(value):
+    return None if value is None else str(value)
+
+
+class SiteIndex:
+    # Metadata for every page, keyed by its path under the content
+    # directory. Entries are replaced as pages are rendered and kept as
+    # they are for pages the build manifest skips, so listings and feeds
+    # can be built from here without reading any page again.
+    def __init__(self, path, pages=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.seen = set()
+        # Fields later stages add to entries; a page whose entry lacks one
+        # is rendered again rather than kept
+        self.required = ()
+        # Entries as they were before this build replaced or removed them
+        # (None for new pages), and the search terms of rendered pages
+        self.previous = {}
+        self.terms = {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"Ignoring unreadable site index: {path}")
+            return cls(path)
+        if data.get("version") != SITE_INDEX_VERSION:
+            print(f"Ignoring site index from another version: {path}")
+            return cls(path)
+        return cls(path, data.get("pages", {}))
+
+    def save(self):
+        data = {"version": SITE_INDEX_VERSION, "pages": self.pages}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def keep(self, key):
+        # True if the page has an entry that can stand for an unchanged page
+        entry = self.pages.get(key)
+        if entry is None or any(field not in entry for field in self.required):
+            return False
+        self.seen.add(key)
+        return True
+
+    def update(self, key, entry, terms=None):
+        self.seen.add(key)
+        self.previous.setdefault(key, self.pages.get(key))
+        self.pages[key] = entry
+        if terms is not None:
+            self.terms[key] = terms
+
+    def remove(self, key):
+        self.seen.discard(key)
+        if key in self.pages:
+            self.previous.setdefault(key, self.pages.pop(key))
+        self.terms.pop(key, None)
+
+    def drop_field(self, field):
+        for entry in self.pages.values():
+            entry.pop(field, None)
+
+    def changed_fields(self):
+        # Entry fields that differ for pages replaced or removed since the
+        # last take_changes(); every field of an added or removed page
+        # counts as changed
+        fields = set()
+        for key, old in self.previous.items():
+            new = self.pages.get(key)
+            if old is None or new is None:
+                fields.update(old or new or ())
+                continue
+            fields.update(
+                field
+                for field in old.keys() | new.keys()
+                if old.get(field) != new.get(field)
+            )
+        return fields
+
+    def take_changes(self):
+        # Returns and resets (previous entries, terms) since the last call
+        previous, terms = self.previous, self.terms
+        self.previous = {}
+        self.terms = {}
+        return previous, terms
+
+    def remove_unseen(self):
+        for key in sorted(set(self.pages) - self.seen):
+            self.remove(key)
@@ -0,0 +1,164 @@
+import hashlib
+import html
+import os
+import re
+import time
+from datetime import date
+
+SITEMAP_NAME = "sitemap.xml"
+# Limits per file from the sitemap protocol; the size is uncompressed
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+# Site index fields a sitemap is built from; pages without a date also
+# depend on their source's mtime
+SITEMAP_FIELDS = ("url", "draft", "date", "updated")
+# The W3C date and time formats <lastmod> takes: YYYY, YYYY-MM, YYYY-MM-DD,
+# or a date with hh:mm, optional seconds and a timezone
+_W3C_DATE_RE = re.compile(
+    r"\d{4}(?:-(?:0[1-9]|1[0-2])(?:-\d{2}"
+    r"(?:T(?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d+)?)?"
+    r"(?:Z|[+-](?:[01]\d|2[0-3]):[0-5]\d))?)?)?"
+)
+
+_URLSET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+_URLSET_FOOTER = "</urlset>\n"
+_INDEX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+_INDEX_FOOTER = "</sitemapindex>\n"
+
+
+class SitemapWriter:
+    # Streams <url> entries to sitemap-1.xml, sitemap-2.xml, ... in
+    # output_dir, starting a new file whenever the next entry would take
+    # the current one past max_urls or max_bytes. Nothing but the open
+    # file is held in memory. close() names a lone file sitemap.xml, or
+    # writes sitemap.xml as an index of the files otherwise.
+    def __init__(self, output_dir, base_url, max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+        self.output_dir = output_dir
+        # Site URL with the basepath, such as https://example.com/blog/
+        self.base_url = base_url
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        # (path, sha256 of the content) for every finished file
+        self.files = []
+        self._file = None
+
+    def add(self, url, lastmod=None):
+        # url is site-root, such as /blog/post/
+        entry = f"<url><loc>{html.escape(self.base_url + url[1:])}</loc>"
+        if lastmod:
+            entry += f"<lastmod>{html.escape(lastmod)}</lastmod>"
+        entry += "</url>\n"
+        size = len(entry.encode())
+        if self._file is not None and (
+            self._count == self.max_urls
+            or self._size + size + len(_URLSET_FOOTER) > self.max_bytes
+        ):
+            self._finish()
+        if self._file is None:
+            self._open(f"sitemap-{len(self.files) + 1}.xml", _URLSET_HEADER)
+        self._write(entry)
+        self._count += 1
+
+    def close(self):
+        # Returns the files written as (path, sha256) pairs
+        if self._file is None and not self.files:
+            self._open(SITEMAP_NAME, _URLSET_HEADER)
+        if self._file is not None:
+            self._finish()
+        if len(self.files) == 1:
+            path, digest = self.files[0]
+            sitemap_path = os.path.join(self.output_dir, SITEMAP_NAME)
+            if path != sitemap_path:
+                os.replace(path, sitemap_path)
+            self.files = [(sitemap_path, digest)]
+            return self.files
+        self._open(SITEMAP_NAME, _INDEX_HEADER)
+        for path, _ in self.files:
+            loc = html.escape(self.base_url + os.path.basename(path))
+            self._write(f"<sitemap><loc>{loc}</loc></sitemap>\n")
+        self._write(_INDEX_FOOTER)
+        self._close_file()
+        return self.files
+
+    def _open(self, name, header):
+        path = os.path.join(self.output_dir, name)
+        self._file = open(path, "w", encoding="utf-8")
+        self._path = path
+        self._digest = hashlib.sha256()
+        self._count = 0
+        self._size = 0
+        self._write(header)
+
+    def _write(self, text):
+        data = text.encode()
+        self._file.write(text)
+        self._digest.update(data)
+        self._size += len(data)
+
+    def _finish(self):
+        self._write(_URLSET_FOOTER)
+        self._close_file()
+
+    def _close_file(self):
+        self._file.close()
+        self._file = None
+        self.files.append((self._path, self._digest.hexdigest()))
+
+
+def source_lastmod(path):
+    # W3C date of the file's last modification, in UTC
+    try:
+        return time.strftime("%Y-%m-%d", time.gmtime(os.path.getmtime(path)))
+    except OSError:
+        return None
+
+
+def page_lastmod(entry, source_path):
+    # Front matter updated or date, falling back to the source's mtime when
+    # neither is a W3C date
+    for value in (entry["updated"], entry["date"]):
+        if _is_w3c_date(value):
+            return value
+    return source_lastmod(source_path)
+
+
+def _is_w3c_date(value):
+    if not value or not _W3C_DATE_RE.fullmatch(value):
+        return False
+    if len(value) < 10:
+        return True
+    # The pattern allows days the month doesn't have
+    try:
+        date.fromisoformat(value[:10])
+    except ValueError:
+        return False
+    return True
+
+
+def write_sitemaps(
+    site_index,
+    content_dir,
+    manifest,
+    base_url,
+    extra_urls=(),
+    max_urls=MAX_URLS,
+    max_bytes=MAX_BYTES,
+):
+    # Every published page in the site index, plus extra_urls such as
+    # generated listing pages, recorded in the build manifest
+    writer = SitemapWriter(manifest.output_dir, base_url, max_urls, max_bytes)
+    for key in sorted(site_index.pages):
+        entry = site_index.pages[key]
+        if entry["draft"]:
+            continue
+        writer.add(entry["url"], page_lastmod(entry, os.path.join(content_dir, key)))
+    for url in extra_urls:
+        writer.add(url)
+    for path, digest in writer.close():
+        manifest.record(path, {"source": "sitemap", "hash": digest})
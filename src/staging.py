@@ -0,0 +1,92 @@
+import ctypes
+import ctypes.util
+import os
+import shutil
+
+_RENAME_EXCHANGE = 2
+_AT_FDCWD = -100
+
+
+def staging_dir_for(public_dir):
+    # Siblings of the public directory live on the same filesystem, which
+    # both hard links and rename require.
+    return os.path.normpath(public_dir) + ".staging"
+
+
+def prepare_staging_dir(public_dir):
+    staging_dir = staging_dir_for(public_dir)
+    if os.path.exists(staging_dir):
+        print(f"Removing leftover staging directory: {staging_dir}")
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    return staging_dir
+
+
+def link_or_copy(source_path, dest_path):
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    try:
+        os.link(source_path, dest_path)
+    except OSError:
+        shutil.copy2(source_path, dest_path)
+
+
+def carry_untracked_files(previous_dir, staging_dir, manifest):
+    # Files in the old output that no build step owns (a CNAME, say) are
+    # carried over so swapping directories never drops them. Without a
+    # previous manifest every old file would look untracked and be carried
+    # forward forever, so the build starts clean instead.
+    if not os.path.isdir(previous_dir):
+        return
+    if not manifest.loaded:
+        print(f"No build manifest; not keeping any files from {previous_dir}")
+        return
+    for dir_path, _, file_names in os.walk(previous_dir):
+        for file_name in file_names:
+            previous_path = os.path.join(dir_path, file_name)
+            key = os.path.relpath(previous_path, previous_dir).replace(os.sep, "/")
+            staged_path = os.path.join(staging_dir, key)
+            if manifest.is_tracked(key) or os.path.exists(staged_path):
+                continue
+            print(f"Keeping untracked file: {previous_path}")
+            link_or_copy(previous_path, staged_path)
+
+
+def _exchange_paths(first_path, second_path):
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        return False
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    renameat2 = getattr(libc, "renameat2", None)
+    if renameat2 is None:
+        return False
+    result = renameat2(
+        _AT_FDCWD,
+        os.fsencode(first_path),
+        _AT_FDCWD,
+        os.fsencode(second_path),
+        _RENAME_EXCHANGE,
+    )
+    return result == 0
+
+
+def swap_into_place(staging_dir, public_dir):
+    public_dir = os.path.normpath(public_dir)
+    if not os.path.exists(public_dir):
+        os.rename(staging_dir, public_dir)
+        return
+
+    # renameat2(RENAME_EXCHANGE) swaps both directories in one atomic step
+    # on Linux. Elsewhere, two renames leave public_dir missing only between
+    # the two calls.
+    if _exchange_paths(staging_dir, public_dir):
+        old_dir = staging_dir
+    else:
+        old_dir = public_dir + ".old"
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        os.rename(public_dir, old_dir)
+        os.rename(staging_dir, public_dir)
+    print(f"Swapped new output into {public_dir}")
+    shutil.rmtree(old_dir)
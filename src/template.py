@@ -0,0 +1,117 @@
+import os
+import re
+from src.minify import minifier, minify_markup
+from src.render_cache import render_variant
+from src.url_resolver import url_resolver
+
+_TAG_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}|\{%\s*include\s+"([^"]+)"\s*%\}')
+
+_template_cache = {}
+
+
+class Template:
+    def __init__(self, segments, dependencies):
+        # Even indexes hold literal text, odd indexes hold (name, raw) pairs
+        # for the variables that are substituted at render time.
+        self.segments = segments
+        self.dependencies = dependencies
+
+    def __repr__(self):
+        return f"Template({self.segments!r}, {self.dependencies!r})"
+
+    def render(self, context):
+        return "".join(self.iter_render(context))
+
+    def iter_render(self, context):
+        # A value is either a string or a callable returning an iterable of
+        # chunks, which lets large content stream straight to the output.
+        segments = self.segments
+        yield segments[0]
+        for i in range(1, len(segments), 2):
+            name, raw = segments[i]
+            value = context.get(name, raw)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value()
+            yield segments[i + 1]
+
+
+def compile_template(template_path, basepath="/"):
+    segments = [""]
+    dependencies = []
+    resolver = url_resolver.with_basepath(basepath)
+    _compile_into(template_path, resolver, segments, dependencies, [])
+    return Template(segments, dependencies)
+
+
+def _compile_into(template_path, resolver, segments, dependencies, include_stack):
+    abs_path = os.path.abspath(template_path)
+    if abs_path in include_stack:
+        raise ValueError(f"Recursive include of template: {template_path}")
+    include_stack.append(abs_path)
+    if template_path not in dependencies:
+        dependencies.append(template_path)
+
+    with open(template_path) as f:
+        source = f.read()
+
+    position = 0
+    for match in _TAG_RE.finditer(source):
+        segments[-1] += _resolve_literal(source[position : match.start()], resolver)
+        name, include_path = match.groups()
+        if name is not None:
+            segments.append((name, match.group(0)))
+            segments.append("")
+        else:
+            include_path = os.path.join(os.path.dirname(template_path), include_path)
+            if not os.path.isfile(include_path):
+                raise ValueError(
+                    f"Included template not found: {include_path} (from {template_path})"
+                )
+            _compile_into(include_path, resolver, segments, dependencies, include_stack)
+        position = match.end()
+    segments[-1] += _resolve_literal(source[position:], resolver)
+    include_stack.pop()
+
+
+def _resolve_literal(html, resolver):
+    html = resolver.rewrite_html(html)
+    if minifier.enabled:
+        html = minify_markup(html)
+    return html
+
+
+def load_template(template_path, basepath="/"):
+    key = (os.path.abspath(template_path), basepath, render_variant())
+    cached = _template_cache.get(key)
+    if cached is not None:
+        mtimes, template = cached
+        if all(_mtime(path) == mtime for path, mtime in mtimes):
+            return template
+
+    template = compile_template(template_path, basepath)
+    mtimes = [(path, _mtime(path)) for path in template.dependencies]
+    _template_cache[key] = (mtimes, template)
+    return template
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def select_template(template_path, layouts_dir, content_dir, source_path):
+    # content/blog/tom/index.md uses layouts/blog/tom.html, then
+    # layouts/blog.html, falling back to the site-wide template.
+    if layouts_dir is None:
+        return template_path
+    section = os.path.dirname(os.path.relpath(source_path, content_dir))
+    while section and section != os.curdir:
+        layout_path = os.path.join(layouts_dir, section + ".html")
+        if os.path.isfile(layout_path):
+            return layout_path
+        section = os.path.dirname(section)
+    return template_path
@@ -1,5 +1,7 @@
 from enum import Enum
 from src.htmlnode import LeafNode
+from src.images import image_options
+from src.url_resolver import url_resolver
 
 
 class TextType(Enum):
@@ -12,6 +14,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
 
         if not isinstance(text_type, TextType):
@@ -22,7 +26,12 @@ class TextNode:
         self.url = url
 
     def __eq__(self, value):
-        return isinstance(value, TextNode) and vars(self) == vars(value)
+        return (
+            isinstance(value, TextNode)
+            and self.text == value.text
+            and self.text_type == value.text_type
+            and self.url == value.url
+        )
 
     def __repr__(self):
         return f"TextNode({self.text!r}, {self.text_type.value!r}, {self.url!r})"
@@ -31,18 +40,21 @@ class TextNode:
 def text_node_to_html_node(text_node):
     match text_node.text_type:
         case TextType.TEXT:
-            return LeafNode(None, text_node.text)
+            return LeafNode._trusted(None, text_node.text)
         case TextType.BOLD:
-            return LeafNode("b", text_node.text)
+            return LeafNode._trusted("b", text_node.text)
         case TextType.ITALIC:
-            return LeafNode("i", text_node.text)
+            return LeafNode._trusted("i", text_node.text)
         case TextType.CODE:
-            return LeafNode("code", text_node.text)
+            return LeafNode._trusted("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": f"{text_node.url}"})
+            href = url_resolver.resolve(f"{text_node.url}")
+            return LeafNode._trusted("a", text_node.text, {"href": href})
         case TextType.IMAGE:
-            return LeafNode(
-                "img", "", {"src": f"{text_node.url}", "alt": f"{text_node.text}"}
-            )
+            src = url_resolver.resolve(f"{text_node.url}")
+            props = {"src": src, "alt": f"{text_node.text}"}
+            if image_options.enabled:
+                props.update(image_options.attributes(f"{text_node.url}"))
+            return LeafNode._trusted("img", "", props)
         case _:
             raise Exception("Invalid Type")
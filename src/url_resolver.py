@@ -0,0 +1,69 @@
+import hashlib
+import json
+import re
+
+_URL_ATTR_RE = re.compile(r'\b(href|src)="([^"]*)"')
+
+
+class UrlResolver:
+    # Maps the site-root URLs written in content and templates, such as
+    # /index.css, to the URLs pages should emit: fingerprinted asset names
+    # first, then prefixed with the basepath the site is served under.
+    # URLs are resolved once, as link and image nodes and template text
+    # are produced, so rendered pages are never rewritten as strings.
+    def __init__(self, assets=None, basepath="/"):
+        self.basepath = basepath
+        self.configure(assets)
+
+    def configure(self, assets):
+        self.assets = assets or {}
+        self._update_key()
+
+    def set_basepath(self, basepath):
+        if basepath != self.basepath:
+            self.basepath = basepath
+            self._update_key()
+
+    def with_basepath(self, basepath):
+        return UrlResolver(self.assets, basepath)
+
+    def _update_key(self):
+        # Anything cached from rendered output must be keyed on this too
+        parts = []
+        if self.assets:
+            data = json.dumps(self.assets, sort_keys=True).encode()
+            parts.append(hashlib.sha256(data).hexdigest()[:16])
+        if self.basepath != "/":
+            parts.append("base:" + self.basepath)
+        self.key = "|".join(parts)
+
+    def resolve(self, url):
+        if not self.key:
+            return url
+        if self.assets:
+            url = self._resolve_asset(url)
+        if self.basepath != "/" and url.startswith("/") and not url.startswith("//"):
+            url = self.basepath + url[1:]
+        return url
+
+    def _resolve_asset(self, url):
+        end = len(url)
+        for marker in "?#":
+            index = url.find(marker)
+            if index != -1:
+                end = min(end, index)
+        resolved = self.assets.get(url[:end])
+        if resolved is None:
+            return url
+        return resolved + url[end:]
+
+    def rewrite_html(self, html):
+        # For markup that is not built from nodes, such as template text
+        if not self.key:
+            return html
+        return _URL_ATTR_RE.sub(
+            lambda match: f'{match.group(1)}="{self.resolve(match.group(2))}"', html
+        )
+
+
+url_resolver = UrlResolver()
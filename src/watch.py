@@ -0,0 +1,99 @@
+import os
+import stat
+import time
+
+POLL_INTERVAL = 0.02
+DEBOUNCE = 0.05
+# Polls are spaced so scanning takes at most 1/SCAN_FACTOR of the time
+SCAN_FACTOR = 20
+
+
+def scan(paths):
+    # Stat cache of every watched file: path -> (mtime_ns, size)
+    stats = {}
+    for path in paths:
+        _scan_into(path, stats)
+    return stats
+
+
+def _scan_into(path, stats):
+    try:
+        path_stat = os.stat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISDIR(path_stat.st_mode):
+        stats[path] = (path_stat.st_mtime_ns, path_stat.st_size)
+        return
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    _scan_into(entry.path, stats)
+                else:
+                    entry_stat = entry.stat()
+                    stats[entry.path] = (entry_stat.st_mtime_ns, entry_stat.st_size)
+            except FileNotFoundError:
+                continue
+
+
+def poll_interval(min_interval, scan_seconds):
+    # A large tree can take longer to scan than the minimum interval, which
+    # would keep a core busy just polling
+    return max(min_interval, scan_seconds * SCAN_FACTOR)
+
+
+def _timed_scan(paths):
+    started = time.perf_counter()
+    stats = scan(paths)
+    return stats, time.perf_counter() - started
+
+
+def diff_stats(old_stats, new_stats):
+    changed = {path for path, sig in new_stats.items() if old_stats.get(path) != sig}
+    removed = set(old_stats) - set(new_stats)
+    return changed, removed
+
+
+def wait_for_changes(paths, stats, interval=POLL_INTERVAL, debounce=DEBOUNCE):
+    sleep = interval
+    while True:
+        time.sleep(sleep)
+        current, scan_seconds = _timed_scan(paths)
+        sleep = poll_interval(interval, scan_seconds)
+        if current != stats:
+            break
+
+    # Editors often write a file in several steps; wait until the tree has
+    # been quiet for the debounce window before reporting the batch.
+    quiet_since = time.monotonic()
+    while time.monotonic() - quiet_since < debounce:
+        time.sleep(sleep)
+        latest, scan_seconds = _timed_scan(paths)
+        sleep = poll_interval(interval, scan_seconds)
+        if latest != current:
+            current = latest
+            quiet_since = time.monotonic()
+
+    changed, removed = diff_stats(stats, current)
+    return current, changed, removed
+
+
+def watch(
+    paths, on_change, interval=POLL_INTERVAL, debounce=DEBOUNCE, after_change=None
+):
+    # after_change runs once a rebuild has been reported, for bookkeeping
+    # that need not delay the rebuilt output
+    stats = scan(paths)
+    print(f"Watching {len(stats)} files for changes (Ctrl+C to stop)...")
+    while True:
+        stats, changed, removed = wait_for_changes(paths, stats, interval, debounce)
+        started = time.perf_counter()
+        try:
+            on_change(changed, removed)
+        except Exception as e:
+            print(f"Rebuild failed: {e}")
+            continue
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"Rebuilt {len(changed) + len(removed)} change(s) in {elapsed_ms:.1f} ms")
+        if after_change is not None:
+            after_change()
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import unittest
+from src.assets import (
+    ASSET_MANIFEST_NAME,
+    fingerprint_files_recursive,
+    fingerprinted_name,
+    write_asset_manifest,
+)
+from src.build_manifest import hash_file
+from src.markdown_blocks import markdown_to_html_node
+from src.template import compile_template
+from src.textnode import TextNode, TextType, text_node_to_html_node
+from src.url_resolver import UrlResolver, url_resolver
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static_dir = os.path.join(self.tmp.name, "static")
+        self.public_dir = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.static_dir, "images"))
+        with open(os.path.join(self.static_dir, "index.css"), "w") as f:
+            f.write("body {}")
+        with open(os.path.join(self.static_dir, "images", "a.png"), "w") as f:
+            f.write("png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test that the hash goes between the name and the extension
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("a.png", "0123456789ab"), "a.01234567.png")
+        self.assertEqual(
+            fingerprinted_name("LICENSE", "0123456789ab"), "LICENSE.01234567"
+        )
+
+    # Test that files are copied under hashed names and mapped by URL
+    def test_fingerprint_files(self):
+        assets = fingerprint_files_recursive(self.static_dir, self.public_dir)
+        css_hash = hash_file(os.path.join(self.static_dir, "index.css"))[:8]
+        self.assertEqual(assets["/index.css"], f"/index.{css_hash}.css")
+        for url in assets.values():
+            self.assertTrue(os.path.isfile(self.public_dir + url))
+        self.assertEqual(sorted(assets), ["/images/a.png", "/index.css"])
+
+        path = write_asset_manifest(self.public_dir, assets)
+        self.assertEqual(os.path.basename(path), ASSET_MANIFEST_NAME)
+        with open(path) as f:
+            self.assertEqual(json.load(f), assets)
+
+
+class TestUrlResolver(unittest.TestCase):
+
+    def tearDown(self):
+        url_resolver.configure(None)
+
+    # Test that only mapped URLs change and suffixes are kept
+    def test_resolve(self):
+        resolver = UrlResolver({"/index.css": "/index.abc.css"})
+        self.assertEqual(resolver.resolve("/index.css"), "/index.abc.css")
+        self.assertEqual(resolver.resolve("/index.css?v=1"), "/index.abc.css?v=1")
+        self.assertEqual(resolver.resolve("/other.css"), "/other.css")
+        self.assertEqual(UrlResolver().key, "")
+        self.assertNotEqual(resolver.key, "")
+
+    # Test that template text and rendered nodes both use the mapping
+    def test_rewrites_templates_and_nodes(self):
+        url_resolver.configure(
+            {"/index.css": "/index.abc.css", "/images/a.png": "/images/a.def.png"}
+        )
+        node = text_node_to_html_node(TextNode("A", TextType.IMAGE, "/images/a.png"))
+        self.assertEqual(node.to_html(), '<img src="/images/a.def.png" alt="A" />')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write('<link href="/index.css" />{{ Content }}')
+            template = compile_template(path, "/site/")
+        self.assertEqual(
+            template.render({"Content": ""}), '<link href="/site/index.abc.css" />'
+        )
+
+
+class TestBasepath(unittest.TestCase):
+
+    def tearDown(self):
+        url_resolver.set_basepath("/")
+
+    # Test that only site-root URLs get the basepath
+    def test_resolve(self):
+        resolver = UrlResolver({"/a.css": "/a.1.css"}, "/site/")
+        self.assertEqual(resolver.resolve("/a.css"), "/site/a.1.css")
+        self.assertEqual(resolver.resolve("/blog/"), "/site/blog/")
+        self.assertEqual(resolver.resolve("//cdn.example/x.js"), "//cdn.example/x.js")
+        self.assertEqual(
+            resolver.resolve("https://example.com/"), "https://example.com/"
+        )
+        self.assertEqual(resolver.resolve("#top"), "#top")
+
+    # Test that links are resolved as nodes but code is left alone
+    def test_code_is_not_rewritten(self):
+        url_resolver.set_basepath("/site/")
+        html = markdown_to_html_node(
+            '[home](/)\n\n`<a href="/x">`\n\n```\n<img src="/y.png">\n```'
+        ).to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/">home</a></p>'
+            '<p><code><a href="/x"></code></p>'
+            '<pre><code><img src="/y.png">\n</code></pre></div>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from benchmarks.adversarial import CASES, time_case
+from benchmarks.corpus import generate_pages
+from benchmarks.run import compare
+from src.markdown_blocks import markdown_to_html_node
+
+
+class TestCorpus(unittest.TestCase):
+
+    # Test that the same seed always produces the same corpus
+    def test_seeded(self):
+        self.assertEqual(generate_pages(5, seed=3), generate_pages(5, seed=3))
+        self.assertNotEqual(generate_pages(5, seed=3), generate_pages(5, seed=4))
+
+    # Test that every generated page is valid input for the parser
+    def test_pages_render(self):
+        for markdown in generate_pages(20, seed=1, inline_density=0.5):
+            self.assertTrue(markdown_to_html_node(markdown).to_html())
+
+    # Test that the block mix controls which blocks are generated
+    def test_block_mix(self):
+        (markdown,) = generate_pages(1, block_mix={"code": 1})
+        self.assertEqual(markdown.count("```"), 60)
+
+
+class TestCompare(unittest.TestCase):
+
+    # Test that only drops beyond the threshold count as regressions
+    def test_threshold(self):
+        baseline = {
+            "config": {},
+            "results": {"a": {"mb_per_sec": 10.0}, "b": {"mb_per_sec": 10.0}},
+        }
+        results = {"a": {"mb_per_sec": 9.5}, "b": {"mb_per_sec": 8.0}}
+        self.assertEqual(compare(results, baseline, 0.1), ["b"])
+
+
+class TestAdversarial(unittest.TestCase):
+
+    # Test that every adversarial case is accepted or cleanly rejected
+    def test_cases_run(self):
+        for name, make_text in CASES.items():
+            self.assertGreaterEqual(time_case(make_text, 1000, 1), 0, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src import generate_page, render_cache
+from src.build_manifest import BuildManifest
+from src.generate_page import generate_pages_recursive
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content_dir = os.path.join(self.root, "content")
+        self.public_dir = os.path.join(self.root, "public")
+        self.template_path = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        os.makedirs(os.path.join(self.content_dir, "blog"))
+        self.write(self.template_path, TEMPLATE)
+        self.write(os.path.join(self.content_dir, "index.md"), "# Home")
+        self.write(os.path.join(self.content_dir, "blog", "post.md"), "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest.load(self.manifest_path, self.public_dir)
+        generate_pages_recursive(
+            basepath, self.content_dir, self.template_path, self.public_dir, manifest
+        )
+        manifest.remove_stale()
+        manifest.save()
+        return manifest
+
+    def output_mtimes(self):
+        return {
+            path: os.stat(os.path.join(self.public_dir, path)).st_mtime_ns
+            for path in ["index.html", os.path.join("blog", "post.html")]
+        }
+
+    # Test that a second build with unchanged inputs leaves outputs untouched
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        before = self.output_mtimes()
+        os.utime(os.path.join(self.public_dir, "index.html"), ns=(0, 0))
+        self.build()
+        self.assertEqual(
+            os.stat(os.path.join(self.public_dir, "index.html")).st_mtime_ns, 0
+        )
+        self.assertEqual(
+            self.output_mtimes()[os.path.join("blog", "post.html")],
+            before[os.path.join("blog", "post.html")],
+        )
+
+    # Test that a new renderer version re-renders unchanged pages
+    def test_renderer_change_rerenders_all(self):
+        self.build()
+        os.utime(os.path.join(self.public_dir, "index.html"), ns=(0, 0))
+        version = render_cache.RENDERER_VERSION + 1
+        with mock.patch.object(generate_page, "RENDERER_VERSION", version):
+            self.build()
+        self.assertNotEqual(
+            os.stat(os.path.join(self.public_dir, "index.html")).st_mtime_ns, 0
+        )
+
+    # Test that only the edited page is re-rendered
+    def test_changed_source_is_rerendered(self):
+        self.build()
+        os.utime(os.path.join(self.public_dir, "index.html"), ns=(0, 0))
+        self.write(os.path.join(self.content_dir, "blog", "post.md"), "# Edited")
+        self.build()
+        with open(os.path.join(self.public_dir, "blog", "post.html")) as f:
+            self.assertIn("<title>Edited</title>", f.read())
+        self.assertEqual(
+            os.stat(os.path.join(self.public_dir, "index.html")).st_mtime_ns, 0
+        )
+
+    # Test that a template change invalidates every page
+    def test_template_change_rerenders_all(self):
+        self.build()
+        self.write(self.template_path, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        with open(os.path.join(self.public_dir, "index.html")) as f:
+            self.assertTrue(f.read().startswith("<h1>Home</h1>"))
+
+    # Test that a basepath change invalidates every page
+    def test_basepath_change_rerenders_all(self):
+        self.build()
+        manifest = self.build("/repo/")
+        self.assertEqual(manifest.entries["index.html"]["basepath"], "/repo/")
+
+    # Test that outputs whose source was deleted are removed
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content_dir, "blog", "post.md"))
+        manifest = self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public_dir, "blog")))
+        self.assertEqual(list(manifest.entries), ["index.html"])
+
+    # Test that a deleted output is regenerated even if its inputs are unchanged
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.public_dir, "index.html"))
+        self.build()
+        self.assertTrue(os.path.exists(os.path.join(self.public_dir, "index.html")))
+
+    # Test that a corrupt manifest falls back to a full build
+    def test_corrupt_manifest_is_ignored(self):
+        self.write(self.manifest_path, "{not json")
+        manifest = BuildManifest.load(self.manifest_path, self.public_dir)
+        self.assertEqual(manifest.entries, {})
+        self.assertFalse(manifest.loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
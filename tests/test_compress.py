@@ -0,0 +1,79 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from src.build_manifest import BuildManifest
+from src.compress import compress_outputs
+
+
+class TestCompressOutputs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp.name, "public")
+        os.makedirs(self.output_dir)
+        self.manifest = BuildManifest(
+            os.path.join(self.tmp.name, "manifest.json"), self.output_dir
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def output(self, name, text):
+        path = os.path.join(self.output_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        self.manifest.record(path, {"source": name})
+        return path
+
+    def compress(self):
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            compress_outputs(self.manifest, min_size=100, jobs=2)
+        return log.getvalue()
+
+    # Test that large text outputs get a matching .gz and small ones do not
+    def test_sidecars(self):
+        page = self.output("index.html", "<p>hello</p>" * 50)
+        self.output("small.css", "body {}")
+        self.output("image.png", "x" * 500)
+        self.compress()
+        with gzip.open(page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 50)
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)),
+            ["image.png", "index.html", "index.html.gz", "small.css"],
+        )
+
+    # Test that unchanged outputs are not recompressed
+    def test_skip_unchanged(self):
+        page = self.output("index.html", "<p>hello</p>" * 50)
+        self.compress()
+        self.assertIn("Skipping unchanged file", self.compress())
+        self.output("index.html", "<p>changed</p>" * 50)
+        self.assertIn("Compressing", self.compress())
+        with gzip.open(page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>changed</p>" * 50)
+
+    # Test that a sidecar goes away with its source
+    def test_removed_source(self):
+        page = self.output("index.html", "<p>hello</p>" * 50)
+        self.compress()
+        self.manifest.remove_output(page)
+        self.compress()
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    # Test that a sidecar goes away when its source drops below min_size
+    def test_shrunk_source(self):
+        self.output("index.html", "<p>hello</p>" * 50)
+        self.compress()
+        self.output("index.html", "<p>hi</p>")
+        self.compress()
+        self.assertEqual(os.listdir(self.output_dir), ["index.html"])
+        self.assertNotIn("index.html.gz", self.manifest.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
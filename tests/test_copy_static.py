@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from src.build_manifest import BuildManifest
+from src.copy_static import files_match, sync_files_recursive
+
+
+class TestSyncFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.static_dir = os.path.join(self.root, "static")
+        self.public_dir = os.path.join(self.root, "public")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        os.makedirs(os.path.join(self.static_dir, "images"))
+        self.write(os.path.join(self.static_dir, "index.css"), "body {}")
+        self.write(os.path.join(self.static_dir, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def sync(self, compare="mtime"):
+        manifest = BuildManifest.load(self.manifest_path, self.public_dir)
+        sync_files_recursive(self.static_dir, self.public_dir, manifest, compare)
+        manifest.remove_stale()
+        manifest.save()
+
+    def public(self, *parts):
+        return os.path.join(self.public_dir, *parts)
+
+    # Test that the first sync copies every file and keeps source mtimes
+    def test_initial_sync(self):
+        self.sync()
+        self.assertTrue(os.path.isfile(self.public("images", "a.png")))
+        self.assertTrue(
+            files_match(
+                os.path.join(self.static_dir, "index.css"), self.public("index.css")
+            )
+        )
+
+    # Test that unchanged files are not rewritten
+    def test_unchanged_files_left_alone(self):
+        self.sync()
+        dest = self.public("index.css")
+        stat = os.stat(dest)
+        self.write(dest, "kept{}!")
+        os.utime(dest, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.sync()
+        with open(dest) as f:
+            self.assertEqual(f.read(), "kept{}!")
+
+    # Test that a modified file is copied again
+    def test_changed_file_copied(self):
+        self.sync()
+        source = os.path.join(self.static_dir, "index.css")
+        self.write(source, "body { color: red }")
+        self.sync()
+        with open(self.public("index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red }")
+
+    # Test that hash comparison catches edits that keep size and mtime
+    def test_hash_compare(self):
+        self.sync()
+        source = os.path.join(self.static_dir, "index.css")
+        stat = os.stat(source)
+        self.write(source, "body{!}")
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertTrue(files_match(source, self.public("index.css")))
+        self.assertFalse(files_match(source, self.public("index.css"), "hash"))
+        self.sync("hash")
+        with open(self.public("index.css")) as f:
+            self.assertEqual(f.read(), "body{!}")
+
+    # Test that files removed from static are removed from the output
+    def test_orphans_removed(self):
+        self.sync()
+        os.remove(os.path.join(self.static_dir, "images", "a.png"))
+        self.sync()
+        self.assertFalse(os.path.exists(self.public("images")))
+        self.assertTrue(os.path.exists(self.public("index.css")))
+
+    # Test that files the sync did not create are never removed
+    def test_untracked_files_kept(self):
+        os.makedirs(self.public_dir)
+        self.write(self.public("CNAME"), "example.com")
+        self.sync()
+        self.sync()
+        self.assertTrue(os.path.exists(self.public("CNAME")))
+
+
+if __name__ == "__main__":
+    unittest.main()
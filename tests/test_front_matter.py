@@ -0,0 +1,91 @@
+import io
+import unittest
+from src.front_matter import parse_front_matter, split_front_matter
+from src.markdown_blocks import PageInfo, markdown_to_html_node
+
+
+class TestFrontMatter(unittest.TestCase):
+
+    # Test the supported value types
+    def test_values(self):
+        metadata = parse_front_matter(
+            [
+                "title: 'Hello: world'",
+                "date: 2024-01-05",
+                "draft: true",
+                "weight: 3",
+                'tags: [one, "two"]',
+                "aliases:",
+                "  - /old/",
+                "  - /older/",
+                "empty:",
+            ]
+        )
+        self.assertEqual(
+            metadata,
+            {
+                "title": "Hello: world",
+                "date": "2024-01-05",
+                "draft": True,
+                "weight": 3,
+                "tags": ["one", "two"],
+                "aliases": ["/old/", "/older/"],
+                "empty": None,
+            },
+        )
+
+    # Test that only plain decimal numbers become integers
+    def test_integers(self):
+        metadata = parse_front_matter(
+            ["a: -5", "b: --5", "c: \u00b2", "d: 1-2", "e: -", "f: \u0663"]
+        )
+        self.assertEqual(
+            metadata,
+            {"a": -5, "b": "--5", "c": "\u00b2", "d": "1-2", "e": "-", "f": "\u0663"},
+        )
+
+    # Test that lines which are not key: value pairs are rejected
+    def test_invalid_line(self):
+        with self.assertRaises(ValueError):
+            parse_front_matter(["# Title"])
+        with self.assertRaises(ValueError):
+            parse_front_matter(["just text"])
+        with self.assertRaises(ValueError):
+            parse_front_matter(["title: a", "- item"])
+
+    # Test that only the front matter is read from a file handle
+    def test_split_file_handle(self):
+        f = io.StringIO("---\ntitle: A\n---\n# Heading\n\ntext\n")
+        metadata, lines = split_front_matter(f)
+        self.assertEqual(metadata, {"title": "A"})
+        self.assertEqual(list(lines), ["# Heading\n", "\n", "text\n"])
+
+    # Test markdown without front matter, or with an unclosed fence
+    def test_no_front_matter(self):
+        metadata, lines = split_front_matter([])
+        self.assertEqual((metadata, list(lines)), ({}, []))
+        metadata, lines = split_front_matter(["# A", "text"])
+        self.assertEqual((metadata, list(lines)), ({}, ["# A", "text"]))
+        metadata, lines = split_front_matter(["---", "title: A", "", "text"])
+        self.assertEqual((metadata, list(lines)), ({}, ["---", "title: A", "", "text"]))
+
+    # Test that fenced text which is not front matter stays markdown
+    def test_not_front_matter(self):
+        for text in (
+            "---\nSome intro text\n---\n\n# Title",
+            "---\n\n# Title\n\n---\n\nbody",
+        ):
+            metadata, lines = split_front_matter(io.StringIO(text))
+            self.assertEqual(metadata, {})
+            self.assertEqual("".join(lines), text)
+        info = PageInfo()
+        html = markdown_to_html_node("---\n\n# Title\n\n---\n\nbody", info)
+        self.assertEqual(info.page_title(), "Title")
+        self.assertIn("<h1>Title</h1>", html.to_html())
+        info = PageInfo()
+        markdown_to_html_node("---\nSome intro text\n---\n\n# Title", info)
+        self.assertEqual(info.page_title(), "Title")
+
+
+if __name__ == "__main__":
+    unittest.main()
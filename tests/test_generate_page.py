@@ -1,5 +1,13 @@
+import os
+import tempfile
 import unittest
-from src.generate_page import extract_title, generate_page
+from src.generate_page import (
+    discover_pages,
+    extract_title,
+    generate_page,
+    generate_pages,
+)
+from src.markdown_blocks import PageInfo, markdown_to_html_node
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -82,6 +90,63 @@ class TestExtractTitle(unittest.TestCase):
         md = "# Hello # World"
         self.assertEqual(extract_title(md), "Hello # World")
 
+    # Test that it follows the block rules PageInfo uses for the title
+    def test_h1_matches_page_info(self):
+        md = "---\ntitle: Meta\n---\n```\n# Not code title\n```\n\n# Real Title"
+        self.assertEqual(extract_title(md), "Real Title")
+        info = PageInfo()
+        markdown_to_html_node(md, info)
+        self.assertEqual(info.title, "Real Title")
+
+
+class TestGeneratePages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content_dir = os.path.join(self.root, "content")
+        self.template_path = os.path.join(self.root, "template.html")
+        for name in ["b", "a", "c"]:
+            os.makedirs(os.path.join(self.content_dir, name))
+            with open(os.path.join(self.content_dir, name, "index.md"), "w") as f:
+                f.write(f"# Page {name}\n\n[home](/) and **bold** text")
+        with open(self.template_path, "w") as f:
+            f.write('<title>{{ Title }}</title><a href="/">x</a>{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_outputs(self, public_dir):
+        outputs = {}
+        for _, dest_path in discover_pages(self.content_dir, public_dir):
+            with open(dest_path, "rb") as f:
+                outputs[os.path.relpath(dest_path, public_dir)] = f.read()
+        return outputs
+
+    # Test that pages are discovered in a deterministic, sorted order
+    def test_discover_pages_sorted(self):
+        pages = discover_pages(self.content_dir, "public")
+        self.assertEqual(
+            [dest for _, dest in pages],
+            [os.path.join("public", name, "index.html") for name in "abc"],
+        )
+
+    # Test that a parallel build is byte-identical to a serial build
+    def test_parallel_matches_serial(self):
+        serial_dir = os.path.join(self.root, "serial")
+        parallel_dir = os.path.join(self.root, "parallel")
+        generate_pages(
+            "/base/", discover_pages(self.content_dir, serial_dir), self.template_path
+        )
+        generate_pages(
+            "/base/",
+            discover_pages(self.content_dir, parallel_dir),
+            self.template_path,
+            jobs=2,
+        )
+        self.assertEqual(self.read_outputs(serial_dir), self.read_outputs(parallel_dir))
+        self.assertEqual(len(self.read_outputs(parallel_dir)), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from src.htmlnode import HTMLNode, LeafNode, ParentNode
 
@@ -159,6 +160,72 @@ class TestParentNode(unittest.TestCase):
         )
 
 
+class TestCompactNodes(unittest.TestCase):
+
+    # Test that nodes use slots instead of a per-instance __dict__
+    def test_no_instance_dict(self):
+        for node in [
+            HTMLNode("p"),
+            LeafNode("p", "x"),
+            ParentNode("div", [LeafNode("p", "x")]),
+        ]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    # Test that trusted construction matches the validated constructors
+    def test_trusted_matches_public(self):
+        leaf = LeafNode._trusted("a", "x", {"href": "/"})
+        parent = ParentNode._trusted("p", [leaf], {"class": "c"})
+        expected = ParentNode("p", [LeafNode("a", "x", {"href": "/"})], {"class": "c"})
+        self.assertIsInstance(parent, ParentNode)
+        self.assertEqual(parent.to_html(), expected.to_html())
+        self.assertEqual(repr(parent.children[0]), repr(expected.children[0]))
+
+    # Test that the public constructor still validates children
+    def test_public_constructor_still_validates(self):
+        with self.assertRaises(TypeError):
+            ParentNode("div", ["not a node"])
+
+
+class TestStreamingHTML(unittest.TestCase):
+
+    # Test that iter_html yields the same document as to_html
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "a "), LeafNode("b", "bold")]),
+                LeafNode("img", "", {"src": "/x.png", "alt": "x"}),
+            ],
+            {"class": "c"},
+        )
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    # Test that a leaf streams as a single chunk
+    def test_leaf_iter_html(self):
+        self.assertEqual(list(LeafNode("p", "hi").iter_html()), ["<p>hi</p>"])
+
+    # Test writing straight to a file object
+    def test_write_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")])])
+        fp = io.StringIO()
+        node.write_html(fp)
+        self.assertEqual(fp.getvalue(), "<ul><li>one</li></ul>")
+
+    # Test that very deep trees do not hit the recursion limit
+    def test_deep_tree(self):
+        node = LeafNode("b", "x")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(html.count("</span>"), 5000)
+
+    # Test that the base class still refuses to render
+    def test_base_node_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            list(HTMLNode("p", "x").iter_html())
+
+
 class TestLeafNode(unittest.TestCase):
 
     # Test for basic leaf node HTML generation
@@ -0,0 +1,121 @@
+import os
+import struct
+import tempfile
+import unittest
+from src.images import image_options, image_size, scan_image_sizes
+from src.markdown_blocks import markdown_to_html_node
+from src.textnode import TextNode, TextType, text_node_to_html_node
+from src.url_resolver import url_resolver
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\rIHDR" + struct.pack(">II", 640, 480)
+GIF = b"GIF89a" + struct.pack("<HH", 32, 16)
+JPEG = (
+    b"\xff\xd8"
+    + b"\xff\xe0"
+    + struct.pack(">H", 16)
+    + b"JFIF\x00" * 2
+    + b"\x00\x00\x00\x00"
+    + b"\xff\xc0"
+    + struct.pack(">HBHH", 17, 8, 200, 300)
+)
+WEBP_VP8 = b"RIFF\x00\x00\x00\x00WEBPVP8 " + bytes(10) + struct.pack("<HH", 50, 60)
+WEBP_VP8L = (
+    b"RIFF\x00\x00\x00\x00WEBPVP8L"
+    + bytes(5)
+    + struct.pack("<I", (70 - 1) | ((80 - 1) << 14))
+)
+WEBP_VP8X = (
+    b"RIFF\x00\x00\x00\x00WEBPVP8X"
+    + bytes(8)
+    + (1000 - 1).to_bytes(3, "little")
+    + (2000 - 1).to_bytes(3, "little")
+)
+
+
+class TestImageSize(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    # Test each supported header format
+    def test_formats(self):
+        cases = {
+            "a.png": (PNG, (640, 480)),
+            "a.gif": (GIF, (32, 16)),
+            "a.jpg": (JPEG, (300, 200)),
+            "a.webp": (WEBP_VP8, (50, 60)),
+            "b.webp": (WEBP_VP8L, (70, 80)),
+            "c.webp": (WEBP_VP8X, (1000, 2000)),
+        }
+        for name, (data, size) in cases.items():
+            self.assertEqual(tuple(image_size(self.write(name, data))), size, name)
+
+    # Test that unknown and truncated files have no size
+    def test_not_an_image(self):
+        self.assertIsNone(image_size(self.write("a.css", b"body {}")))
+        self.assertIsNone(image_size(self.write("a.jpg", b"\xff\xd8\xff\xc0")))
+        self.assertIsNone(image_size(os.path.join(self.tmp.name, "missing.png")))
+
+    # Test that a rewritten file is read again
+    def test_cache_follows_mtime(self):
+        path = self.write("a.gif", GIF)
+        self.assertEqual(image_size(path), (32, 16))
+        self.write("a.gif", b"GIF89a" + struct.pack("<HH", 8, 4))
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(image_size(path), (8, 4))
+
+
+class TestImageAttributes(unittest.TestCase):
+
+    def setUp(self):
+        # Earlier page builds may have left another basepath configured
+        url_resolver.set_basepath("/")
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmp.name, "images"))
+        with open(os.path.join(self.tmp.name, "images", "a.png"), "wb") as f:
+            f.write(PNG)
+
+    def tearDown(self):
+        image_options.configure(None)
+        self.tmp.cleanup()
+
+    # Test that sizes are collected by site-root URL
+    def test_scan(self):
+        self.assertEqual(scan_image_sizes(self.tmp.name), {"/images/a.png": [640, 480]})
+
+    # Test the emitted attributes for known and unknown images
+    def test_attributes(self):
+        image_options.configure(self.tmp.name)
+        node = text_node_to_html_node(TextNode("A", TextType.IMAGE, "/images/a.png"))
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/images/a.png" alt="A" width="640" height="480" '
+            'loading="lazy" decoding="async" />',
+        )
+        node = text_node_to_html_node(TextNode("B", TextType.IMAGE, "https://x/b.png"))
+        self.assertEqual(
+            node.to_html(),
+            '<img src="https://x/b.png" alt="B" loading="lazy" decoding="async" />',
+        )
+
+    # Test that only the first image on a page is left eager
+    def test_eager_first_image(self):
+        image_options.configure(self.tmp.name, eager_first=True)
+        html = markdown_to_html_node(
+            "# T\n\n![a](/images/a.png)\n\n![b](/images/a.png)"
+        ).to_html()
+        self.assertEqual(html.count('loading="lazy"'), 1)
+        self.assertLess(html.index('alt="a"'), html.index('loading="lazy"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,6 @@
+import random
+import re
+import time
 import unittest
 from src.inline_markdown import (
     extract_markdown_images,
@@ -555,3 +558,88 @@ class TestTextToTextNodes(unittest.TestCase):
             TextNode("link", TextType.LINK, "https://boot.dev"),
         ]
         self.assertEqual(text_to_textnodes(text), expected)
+
+
+def split_pipeline(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    return nodes
+
+
+class TestSinglePassTokenizer(unittest.TestCase):
+
+    def outcome(self, func, text):
+        try:
+            return func(text)
+        except ValueError:
+            return "error"
+
+    # Test that the scanner matches the five-pass split pipeline
+    def test_matches_split_pipeline(self):
+        rng = random.Random(0)
+        for _ in range(5000):
+            text = "".join(rng.choice("ab *_`[]()!") for _ in range(rng.randint(0, 25)))
+            self.assertEqual(
+                self.outcome(text_to_textnodes, text),
+                self.outcome(split_pipeline, text),
+                text,
+            )
+
+    # Test that markup nested inside a bold span is left as raw text
+    def test_bold_keeps_inner_markup(self):
+        self.assertEqual(
+            text_to_textnodes("**a _b_ `c`** d"),
+            [
+                TextNode("a _b_ `c`", TextType.BOLD),
+                TextNode(" d", TextType.TEXT),
+            ],
+        )
+
+    # Test that an italic pair cannot straddle a bold delimiter
+    def test_italic_cannot_cross_bold(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("_a **b_ c**")
+
+    # Test the plain text fast path, including empty text
+    def test_plain_text_fast_path(self):
+        self.assertEqual(text_to_textnodes(""), [TextNode("", TextType.TEXT)])
+        self.assertEqual(
+            text_to_textnodes("no markup here."),
+            [TextNode("no markup here.", TextType.TEXT)],
+        )
+
+
+class TestAdversarialInput(unittest.TestCase):
+
+    # Test that the bracket scanner finds exactly what the old regexes found
+    def test_matches_regex(self):
+        rng = random.Random(1)
+        for _ in range(5000):
+            text = "".join(rng.choice("a![]()\n") for _ in range(rng.randint(0, 30)))
+            self.assertEqual(
+                extract_markdown_images(text),
+                re.findall(r"!\[(.*?)\]\((.*?)\)", text),
+                text,
+            )
+            self.assertEqual(
+                extract_markdown_links(text),
+                re.findall(r"\[(.*?)\]\((.*?)\)", text),
+                text,
+            )
+
+    # Test that many links on one line are all split out
+    def test_many_links(self):
+        nodes = text_to_textnodes("[a](b) " * 2000)
+        self.assertEqual(len(nodes), 4000)
+        self.assertEqual(nodes[-2], TextNode("a", TextType.LINK, "b"))
+
+    # Test that pathological runs finish quickly instead of backtracking
+    def test_unbalanced_runs_are_fast(self):
+        for text in ["[" * 100_000, "![" * 50_000, "[a](" * 25_000, "](" * 50_000]:
+            start = time.perf_counter()
+            self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+            self.assertLess(time.perf_counter() - start, 1.0)
@@ -0,0 +1,63 @@
+import unittest
+from src.link_check import check_links, link_target
+from src.markdown_blocks import PageInfo, markdown_to_html_node
+from src.render_cache import block_cache
+from src.site_index import SiteIndex
+from src.url_resolver import url_resolver
+
+
+class TestLinkTarget(unittest.TestCase):
+
+    # Test which URLs are checked and the output path they resolve to
+    def test_targets(self):
+        page = "/site/blog/a/"
+        self.assertEqual(link_target("/site/blog/b/", page, "/site/"), "blog/b/")
+        self.assertEqual(link_target("img.png?v=1#x", page, "/site/"), "blog/a/img.png")
+        self.assertEqual(link_target("../b/", page, "/site/"), "blog/b/")
+        self.assertEqual(link_target("/site/a%20b", page, "/site/"), "a b")
+        self.assertEqual(link_target("/elsewhere", page, "/site/"), "/elsewhere")
+        for url in ["https://x.org/", "//x.org/a", "mailto:a@x.org", "#top"]:
+            self.assertIsNone(link_target(url, page, "/site/"), url)
+
+
+class TestCheckLinks(unittest.TestCase):
+
+    def tearDown(self):
+        url_resolver.set_basepath("/")
+        block_cache.configure(0)
+        block_cache.take_stats()
+
+    def page(self, markdown):
+        info = PageInfo()
+        markdown_to_html_node(markdown, info)
+        return {"url": "/a/", "links": info.to_dict()["links"]}
+
+    # Test links collected while rendering, with and without the block cache
+    def test_report(self):
+        url_resolver.set_basepath("/site/")
+        markdown = (
+            "# A\n\n[home](/) [b](/b) [gone](/gone/) [ext](https://x.org)\n\n"
+            "![img](/images/a.png) ![missing](missing.png)"
+        )
+        outputs = {"index.html", "b.html", "images/a.png", "a/index.html"}
+        site_index = SiteIndex(None)
+        site_index.pages = {"a/index.md": self.page(markdown)}
+        expected = {
+            "checked": 5,
+            "skipped": 1,
+            "broken": [
+                {"source": "a/index.md", "page": "/a/", "url": "/site/gone/"},
+                {"source": "a/index.md", "page": "/a/", "url": "missing.png"},
+            ],
+        }
+        self.assertEqual(check_links(site_index, outputs, "/site/"), expected)
+
+        block_cache.configure(1024 * 1024)
+        self.page(markdown)
+        site_index.pages = {"a/index.md": self.page(markdown)}
+        self.assertEqual(block_cache.hits, 3)
+        self.assertEqual(check_links(site_index, outputs, "/site/"), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import contextlib
+import io
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from src import main
+from src.build_manifest import BuildManifest, hash_file
+from src.images import image_options
+from src.search_index import DOCS_NAME, SEARCH_DIR, search_options
+from src.site_index import SiteIndex
+from src.url_resolver import url_resolver
+
+TEMPLATE = '<title>{{ Title }}</title><link href="/index.css">{{ Content }}'
+
+
+def png(width, height):
+    return (
+        b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\rIHDR" + struct.pack(">II", width, height)
+    )
+
+
+class TestRebuildChanged(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        # Distinct, increasing mtimes, so no edit goes unnoticed
+        self.mtime = 1718454600
+        paths = {
+            "static_dir": "static",
+            "public_dir": "docs",
+            "content_dir": "content",
+            "template_path": "template.html",
+            "layouts_dir": "layouts",
+            "manifest_path": ".build_manifest.json",
+            "site_index_path": ".site_index.json",
+        }
+        for name, path in paths.items():
+            patcher = mock.patch.object(main, name, self.path(path))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.reset_options)
+        self.write("static/index.css", "body { color: black; }")
+        self.write("static/images/a.png", png(640, 480))
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\n![A](/images/a.png)\n\nWelcome home")
+        self.write("content/about.md", "# About\n\nAll about zebras")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reset_options(self):
+        url_resolver.configure(None)
+        url_resolver.set_basepath("/")
+        image_options.configure(None)
+        search_options.configure(False)
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def write(self, name, data):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        os.utime(path, (self.mtime, self.mtime))
+        self.mtime += 1
+        return path
+
+    def read(self, name):
+        with open(self.path(name)) as f:
+            return f.read()
+
+    def build(self, *flags):
+        argv = ["main.py", "--in-place", *flags]
+        with mock.patch.object(sys, "argv", argv):
+            with contextlib.redirect_stdout(io.StringIO()):
+                main.main()
+            self.args = main.parse_args()
+        self.manifest = BuildManifest.load(main.manifest_path, main.public_dir)
+        self.site_index = SiteIndex.load(main.site_index_path)
+        if self.args.search:
+            self.site_index.required = ("search",)
+
+    def rebuild(self, changed=(), removed=()):
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.rebuild_changed(
+                self.args, self.manifest, self.site_index, 1, set(changed), set(removed)
+            )
+            main.finish_rebuild(self.args, self.manifest, self.site_index)
+        # finish_rebuild saved both for the next build
+        saved = BuildManifest.load(main.manifest_path, main.public_dir)
+        self.assertEqual(saved.entries, self.manifest.entries)
+        self.assertEqual(
+            SiteIndex.load(main.site_index_path).pages, self.site_index.pages
+        )
+
+    def mtime_ns(self, name):
+        return os.stat(self.path(name)).st_mtime_ns
+
+    # Test that an edited page is rendered again and no other page is
+    def test_content_edited(self):
+        self.build()
+        home_mtime = self.mtime_ns("docs/index.html")
+        about = self.write("content/about.md", "# About Us\n\nAll about zebras")
+        self.rebuild(changed=[about])
+        self.assertIn("<title>About Us</title>", self.read("docs/about.html"))
+        self.assertEqual(self.site_index.pages["about.md"]["title"], "About Us")
+        self.assertIn("about.html", self.manifest.entries)
+        self.assertEqual(self.mtime_ns("docs/index.html"), home_mtime)
+
+    # Test that a removed page loses its output, manifest entry and
+    # sitemap URL
+    def test_content_removed(self):
+        self.build("--sitemap", "--site-url", "https://example.com")
+        self.assertIn("/about.html", self.read("docs/sitemap.xml"))
+        about = self.path("content/about.md")
+        os.remove(about)
+        self.rebuild(removed=[about])
+        self.assertFalse(os.path.exists(self.path("docs/about.html")))
+        self.assertNotIn("about.html", self.manifest.entries)
+        self.assertNotIn("about.md", self.site_index.pages)
+        self.assertNotIn("/about.html", self.read("docs/sitemap.xml"))
+
+    # Test that the sitemap is only written again when a page's lastmod
+    # can have changed
+    def test_sitemap_changed(self):
+        self.write("content/about.md", "---\ndate: 2024-01-05\n---\n# About")
+        self.build("--sitemap", "--site-url", "https://example.com")
+        sitemap_mtime = self.mtime_ns("docs/sitemap.xml")
+        about = self.write(
+            "content/about.md", "---\ndate: 2024-01-05\n---\n# About\n\nx"
+        )
+        self.rebuild(changed=[about])
+        self.assertEqual(self.mtime_ns("docs/sitemap.xml"), sitemap_mtime)
+        home = self.path("content/index.md")
+        os.utime(home, (86400 * 365, 86400 * 365))
+        self.rebuild(changed=[home])
+        self.assertIn("<lastmod>1971-01-01</lastmod>", self.read("docs/sitemap.xml"))
+
+    # Test that a fingerprinted asset is renamed and pages link to the new name
+    def test_static_fingerprint(self):
+        self.build("--fingerprint")
+        old_url = url_resolver.assets["/index.css"]
+        css = self.write("static/index.css", "body { color: white; }")
+        self.rebuild(changed=[css])
+        new_url = url_resolver.assets["/index.css"]
+        self.assertNotEqual(new_url, old_url)
+        self.assertFalse(os.path.exists(self.path("docs" + old_url)))
+        self.assertTrue(os.path.exists(self.path("docs" + new_url)))
+        self.assertNotIn(old_url[1:], self.manifest.entries)
+        self.assertIn(new_url[1:], self.manifest.entries)
+        for name in ("docs/index.html", "docs/about.html"):
+            self.assertIn(f'href="{new_url}"', self.read(name))
+
+    # Test that a resized image updates the pages showing it
+    def test_static_image_attrs(self):
+        self.build("--image-attrs")
+        self.assertIn('width="640" height="480"', self.read("docs/index.html"))
+        image = self.write("static/images/a.png", png(320, 240))
+        self.rebuild(changed=[image])
+        self.assertIn('width="320" height="240"', self.read("docs/index.html"))
+        with open(self.path("docs/images/a.png"), "rb") as f:
+            self.assertEqual(f.read(), png(320, 240))
+
+    # Test that a template change renders every page again
+    def test_template_changed(self):
+        self.build()
+        template = self.write("template.html", "<main>" + TEMPLATE + "</main>")
+        self.rebuild(changed=[template])
+        for name in ("docs/index.html", "docs/about.html"):
+            self.assertTrue(self.read(name).startswith("<main>"), name)
+        inputs = self.manifest.entries["about.html"]["inputs"]
+        self.assertEqual(inputs[template], hash_file(template))
+
+    # Test that a missing search shard is written again, even when the
+    # change itself touches no page
+    def test_search_shard_missing(self):
+        self.build("--search")
+        search_dir = self.path(os.path.join("docs", SEARCH_DIR))
+        shards = {}
+        for name in os.listdir(search_dir):
+            with open(os.path.join(search_dir, name)) as f:
+                shards[name] = f.read()
+        lost = sorted(set(shards) - {DOCS_NAME})[0]
+        os.remove(os.path.join(search_dir, lost))
+        css = self.write("static/index.css", "body { color: white; }")
+        self.rebuild(changed=[css])
+        for name, text in shards.items():
+            with open(os.path.join(search_dir, name)) as f:
+                self.assertEqual(f.read(), text, name)
+        self.assertIn(f"{SEARCH_DIR}/{lost}", self.manifest.entries)
+        for entry in self.site_index.pages.values():
+            self.assertIn("search", entry)
+
+
+if __name__ == "__main__":
+    unittest.main()
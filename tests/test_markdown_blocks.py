@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from src.textnode import text_node_to_html_node, TextNode, TextType
@@ -6,7 +7,10 @@ from src.markdown_blocks import (
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
+    iter_blocks,
+    PageInfo,
 )
+from src.search_index import search_options
 
 
 class TestTextToHtmlNode(unittest.TestCase):
@@ -262,5 +266,105 @@ the **same** even with inline stuff
         )
 
 
+class TestIterBlocks(unittest.TestCase):
+
+    # Test that blocks come out typed, straight from a file handle
+    def test_file_handle(self):
+        f = io.StringIO("# Title\n\n- a\n- b\n\n  text  \n")
+        self.assertEqual(
+            list(iter_blocks(f)),
+            [
+                (BlockType.HEADING, ["# Title"]),
+                (BlockType.UNORDERED_LIST, ["- a", "- b"]),
+                (BlockType.PARAGRAPH, ["text"]),
+            ],
+        )
+
+    # Test that a fenced code block keeps its blank lines
+    def test_code_with_blank_lines(self):
+        md = "```\ndef f():\n\n\n    return 1\n```\n\nafter"
+        self.assertEqual(
+            markdown_to_blocks(md), ["```\ndef f():\n\n\n    return 1\n```", "after"]
+        )
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>def f():\n\n\n    return 1\n</code></pre><p>after</p></div>",
+        )
+
+    # Test that a language after the opening backticks is not code text
+    def test_code_language(self):
+        self.assertEqual(
+            markdown_to_html_node("```python\nx = 1\n```").to_html(),
+            "<div><pre><code>x = 1\n</code></pre></div>",
+        )
+        self.assertEqual(
+            markdown_to_html_node("```python\nx = 1\n\ny = 2\n```\n\nafter").to_html(),
+            "<div><pre><code>x = 1\n\ny = 2\n</code></pre><p>after</p></div>",
+        )
+
+    # Test that an unclosed fence falls back to ordinary blocks
+    def test_unclosed_fence(self):
+        self.assertEqual(
+            markdown_to_blocks("```\ncode\n\nmore text"), ["```\ncode", "more text"]
+        )
+
+    # Test that a closed fence followed by text is not extended
+    def test_closed_fence_not_extended(self):
+        self.assertEqual(
+            markdown_to_blocks("```\ncode\n```\ntext\n\n```\nb\n```"),
+            ["```\ncode\n```\ntext", "```\nb\n```"],
+        )
+
+    # Test that inline code at the start of a paragraph opens no fence
+    def test_inline_code_not_fence(self):
+        self.assertEqual(
+            markdown_to_blocks("```x``` and more\n\n# Title\n\ntext"),
+            ["```x``` and more", "# Title", "text"],
+        )
+        self.assertEqual(
+            markdown_to_blocks("``` x\n\ntext\n```"), ["``` x", "text\n```"]
+        )
+
+
+class TestPageInfo(unittest.TestCase):
+
+    # Test that front matter, title and word count come out of one pass
+    def test_collected(self):
+        md = "---\ntitle: Front\ntags: [a, b]\n---\n## Sub\n\n# Hello\n\nOne **two** `three`"
+        info = PageInfo()
+        html = markdown_to_html_node(md, info).to_html()
+        self.assertEqual(
+            html,
+            "<div><h2>Sub</h2><h1>Hello</h1><p>One <b>two</b> <code>three</code></p></div>",
+        )
+        self.assertEqual(info.metadata, {"title": "Front", "tags": ["a", "b"]})
+        self.assertEqual(info.title, "Hello")
+        self.assertEqual(info.word_count, 5)
+        self.assertEqual(info.page_title(), "Front")
+
+    # Test that a page without any title is rejected
+    def test_no_title(self):
+        info = PageInfo()
+        markdown_to_html_node("## Sub\n\ntext", info)
+        with self.assertRaises(ValueError):
+            info.page_title()
+
+    # Test that search terms are only collected while search is enabled
+    def test_terms(self):
+        info = PageInfo()
+        markdown_to_html_node("# Title\n\nThe tower", info)
+        self.assertEqual(info.terms, {})
+        self.assertNotIn("terms", info.to_dict())
+        search_options.configure(True)
+        try:
+            info = PageInfo()
+            markdown_to_html_node("# Title\n\nThe tower", info)
+            self.assertEqual(
+                info.to_dict()["terms"], {"title": 1, "the": 1, "tower": 1}
+            )
+        finally:
+            search_options.configure(False)
+
+
 if __name__ == "__main__":
     unittest.main()
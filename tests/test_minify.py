@@ -0,0 +1,58 @@
+import unittest
+from src.htmlnode import LeafNode, ParentNode, RawHTMLNode
+from src.markdown_blocks import markdown_to_html_node
+from src.minify import minify_markup
+
+
+class TestMinifyNodes(unittest.TestCase):
+
+    # Test whitespace, quotes and void elements in serializer output
+    def test_minified_tree(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode(None, "a  \n b <!-- note -->"),
+                LeafNode("a", "link", {"href": "/x", "title": "two words"}),
+                LeafNode("img", "", {"src": "/a.png", "alt": ""}),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(minify=True),
+            '<p>a b <a href=/x title="two words">link</a><img src=/a.png alt="">'
+            "</p>",
+        )
+
+    # Test that code blocks come through byte for byte
+    def test_preserves_pre_and_code(self):
+        md = "```\ndef f():\n    return  1\n```\n\ntext with `a  b`"
+        node = markdown_to_html_node(md)
+        self.assertEqual(
+            "".join(node.iter_html(minify=True)),
+            "<div><pre><code>def f():\n    return  1\n</code></pre>"
+            "<p>text with <code>a  b</code></p></div>",
+        )
+
+    # Test that already serialized markup is emitted untouched
+    def test_raw_html(self):
+        node = ParentNode("div", [RawHTMLNode("<pre>a\n  b</pre>")])
+        self.assertEqual(node.to_html(minify=True), "<div><pre>a\n  b</pre></div>")
+
+
+class TestMinifyMarkup(unittest.TestCase):
+
+    # Test template text minification
+    def test_template_text(self):
+        html = (
+            "<!doctype html>\n<html>\n  <head>\n    <!-- meta -->\n"
+            '    <meta charset="utf-8" />\n  </head>\n'
+            "  <body><pre>keep\n   this</pre>  <b>a   b</b></body>\n</html>"
+        )
+        self.assertEqual(
+            minify_markup(html),
+            "<!doctype html><html><head><meta charset=utf-8></head>"
+            "<body><pre>keep\n   this</pre> <b>a b</b></body></html>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
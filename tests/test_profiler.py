@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from src.generate_page import render_page
+from src.markdown_blocks import markdown_to_html_node
+from src.profiler import Profiler, profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    # Test that a disabled profiler records nothing
+    def test_disabled(self):
+        p = Profiler()
+        with p.span("read", "stage"):
+            pass
+        self.assertEqual(p.events, [])
+
+    # Test that spans are recorded as complete trace events
+    def test_span_event(self):
+        p = Profiler()
+        p.enable()
+        with p.span("page", "page", path="a.md"):
+            with p.span("read", "stage"):
+                pass
+        self.assertEqual([event["name"] for event in p.events], ["read", "page"])
+        event = p.events[1]
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"], {"path": "a.md"})
+        self.assertGreaterEqual(event["dur"], p.events[0]["dur"])
+
+    # Test stage totals and the slowest page ranking
+    def test_summary_data(self):
+        p = Profiler()
+        p.events = [
+            {"name": "page", "cat": "page", "dur": 5, "args": {"path": "a"}},
+            {"name": "page", "cat": "page", "dur": 9, "args": {"path": "b"}},
+            {"name": "read", "cat": "stage", "dur": 2, "args": {}},
+            {
+                "name": "block_to_html_node",
+                "cat": "stage",
+                "dur": 3,
+                "args": {"text_to_textnodes_us": 1.5},
+            },
+        ]
+        self.assertEqual(
+            p.stage_totals(),
+            {"read": 2, "block_to_html_node": 3, "text_to_textnodes": 1.5},
+        )
+        self.assertEqual([event["args"]["path"] for event in p.slowest_pages(1)], ["b"])
+
+    # Test writing a trace file loadable as trace-event JSON
+    def test_write_trace(self):
+        p = Profiler()
+        p.enable()
+        with p.span("read", "stage"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            p.write_trace(path)
+            with open(path) as f:
+                data = json.load(f)
+        self.assertEqual(len(data["traceEvents"]), 1)
+
+    # Test that the markdown pipeline reports its stages
+    def test_markdown_stages(self):
+        profiler.enable()
+        try:
+            markdown_to_html_node("# Title\n\nSome **bold** text")
+            events = profiler.take_events()
+        finally:
+            profiler.enabled = False
+        names = [event["name"] for event in events]
+        self.assertEqual(names, ["markdown_to_blocks", "block_to_html_node"])
+        self.assertIn("text_to_textnodes_us", events[1]["args"])
+
+    # Test that streamed serialization and templating still report stages
+    def test_page_stages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page_path = os.path.join(tmp, "page.md")
+            template_path = os.path.join(tmp, "template.html")
+            with open(page_path, "w") as f:
+                f.write("# Title\n\ntext")
+            with open(template_path, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            profiler.enable()
+            try:
+                render_page("/", page_path, template_path)
+                events = profiler.take_events()
+            finally:
+                profiler.enabled = False
+        names = [event["name"] for event in events]
+        self.assertEqual(names[-2:], ["to_html", "template"])
+        self.assertIn("load_template", names)
+
+    # Test that a streamed span leaves out the generators it pulls from
+    def test_iter_span_nested(self):
+        p = Profiler()
+        p.enable()
+        inner = p.iter_span("inner", (time.sleep(0.01) or str(i) for i in range(3)))
+        self.assertEqual("".join(p.iter_span("outer", inner)), "012")
+        outer, inner = p.events[1], p.events[0]
+        self.assertEqual((outer["name"], inner["name"]), ("outer", "inner"))
+        self.assertGreaterEqual(inner["dur"], 30000)
+        self.assertLess(outer["dur"], inner["dur"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src import render_cache
+from src.generate_page import render_page
+from src.markdown_blocks import BlockType, PageInfo, markdown_to_html_node
+from src.render_cache import (
+    BlockCache,
+    PageCache,
+    block_cache,
+    block_key,
+    page_cache,
+    render_variant,
+)
+from src.url_resolver import url_resolver
+
+
+class TestBlockCache(unittest.TestCase):
+
+    # Test that the same block text always maps to the same key
+    def test_block_key(self):
+        self.assertEqual(
+            block_key(BlockType.PARAGRAPH, ["a", "b"]),
+            block_key(BlockType.PARAGRAPH, ["a", "b"]),
+        )
+        self.assertNotEqual(
+            block_key(BlockType.PARAGRAPH, ["a", "b"]),
+            block_key(BlockType.PARAGRAPH, ["a b"]),
+        )
+        self.assertNotEqual(
+            block_key(BlockType.PARAGRAPH, ["# a"]),
+            block_key(BlockType.HEADING, ["# a"]),
+        )
+
+    # Test hit and miss counting
+    def test_counters(self):
+        cache = BlockCache(1024 * 1024)
+        self.assertIsNone(cache.get(b"a"))
+        cache.put(b"a", "<p>a</p>")
+        self.assertEqual(cache.get(b"a"), "<p>a</p>")
+        self.assertEqual(cache.take_stats(), {"hits": 1, "misses": 1, "evictions": 0})
+        self.assertEqual(cache.hits, 0)
+
+    # Test that the least recently used entry is evicted first
+    def test_lru_eviction(self):
+        cache = BlockCache(1024 * 1024)
+        cache.put(b"a", "x" * 100)
+        cache.put(b"b", "y" * 100)
+        cache.get(b"a")
+        cache.configure(cache.size - 1)
+        self.assertEqual(list(cache.entries), [b"a"])
+        self.assertEqual(cache.evictions, 1)
+
+    # Test that an entry larger than the whole budget is not stored
+    def test_oversized_entry(self):
+        cache = BlockCache(64)
+        cache.put(b"a", "x" * 1000)
+        self.assertEqual(cache.entries, {})
+        self.assertEqual(cache.size, 0)
+
+    # Test that an entry's size includes the PageInfo stored with its HTML
+    def test_entry_size(self):
+        info = PageInfo()
+        info.terms = {f"term{i}": i for i in range(100)}
+        info.links = [f"/page/{i}/" for i in range(100)]
+        cache = BlockCache(1024 * 1024)
+        cache.put(b"a", ("<p>a</p>", PageInfo()))
+        small = cache.size
+        cache.put(b"a", ("<p>a</p>", info))
+        self.assertGreater(cache.size - small, 100 * 2 * 50)
+        cache.put(b"b", "<p>b</p>")
+        cache.configure(cache.size - 1)
+        self.assertEqual(list(cache.entries), [b"b"])
+
+
+class TestCachedRendering(unittest.TestCase):
+
+    def setUp(self):
+        block_cache.configure(1024 * 1024)
+        block_cache.take_stats()
+
+    def tearDown(self):
+        block_cache.configure(0)
+        block_cache.take_stats()
+
+    # Test that repeated blocks hit the cache and render identically
+    def test_repeated_blocks(self):
+        md = "# Title\n\n- shared\n- list\n\nSome **text**\n\n- shared\n- list"
+        expected = (
+            "<div><h1>Title</h1><ul><li>shared</li><li>list</li></ul>"
+            "<p>Some <b>text</b></p><ul><li>shared</li><li>list</li></ul></div>"
+        )
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(
+            block_cache.take_stats(), {"hits": 5, "misses": 3, "evictions": 0}
+        )
+
+    # Test that cached blocks still count towards the page's word count
+    def test_block_info(self):
+        md = "# Title\n\nSome **text** here"
+        first, second = PageInfo(), PageInfo()
+        markdown_to_html_node(md, first)
+        markdown_to_html_node(md, second)
+        self.assertEqual(block_cache.hits, 2)
+        self.assertEqual((second.title, second.word_count), ("Title", 4))
+        self.assertEqual(first.word_count, second.word_count)
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PageCache(os.path.join(self.tmp.name, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test that a stored page comes back for the same markdown only
+    def test_round_trip(self):
+        self.assertIsNone(self.cache.get("# A"))
+        self.cache.put("# A", {"title": "A"}, "<div><h1>A</h1></div>")
+        self.assertEqual(
+            self.cache.get("# A"), ({"title": "A"}, "<div><h1>A</h1></div>")
+        )
+        self.assertIsNone(self.cache.get("# B"))
+        self.assertEqual(self.cache.take_stats(), {"hits": 1, "misses": 2})
+
+    # Test that entries from another renderer version are not served
+    def test_renderer_version(self):
+        self.cache.put("# A", {"title": "A"}, "<h1>A</h1>")
+        version = render_cache.RENDERER_VERSION + 1
+        with mock.patch.object(render_cache, "RENDERER_VERSION", version):
+            self.assertIsNone(self.cache.get("# A"))
+
+    # Test that a damaged entry counts as a miss
+    def test_corrupt_entry(self):
+        self.cache.put("# A", {"title": "A"}, "<h1>A</h1>")
+        with open(self.cache.entry_path("# A"), "w") as f:
+            f.write("{")
+        self.assertIsNone(self.cache.get("# A"))
+
+    # Test that page generation fills the cache and then reads from it
+    def test_render_page(self):
+        source = os.path.join(self.tmp.name, "index.md")
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(source, "w") as f:
+            f.write("# Home\n\n[a](/a)")
+        with open(template, "w") as f:
+            f.write("{{ Title }}|{{ Content }}")
+        page_cache.configure(self.cache.directory)
+        try:
+            first = render_page("/site/", source, template)
+            path = page_cache.entry_path("# Home\n\n[a](/a)", render_variant())
+            with open(path, "w") as f:
+                f.write(
+                    '{"info": {"metadata": {}, "title": "Cached", "excerpt": null,'
+                    ' "word_count": 0, "terms": {}, "links": []},'
+                    ' "html": "<p href=\\"/b\\"></p>"}'
+                )
+            second = render_page("/site/", source, template)
+        finally:
+            page_cache.configure(None)
+            page_cache.take_stats()
+            url_resolver.set_basepath("/")
+        self.assertEqual(
+            first, 'Home|<div><h1>Home</h1><p><a href="/site/a">a</a></p></div>'
+        )
+        # Cached content is stored with its URLs already resolved
+        self.assertEqual(second, 'Cached|<p href="/b"></p>')
+
+
+if __name__ == "__main__":
+    unittest.main()
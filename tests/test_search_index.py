@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import unittest
+from src.build_manifest import BuildManifest
+from src.generate_page import generate_pages_recursive, page_terms
+from src.search_index import (
+    check_search_index,
+    search_options,
+    shard_name,
+    tokenize,
+    update_search_index,
+)
+from src.site_index import SiteIndex
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestTokenize(unittest.TestCase):
+
+    # Test splitting, lowercasing and dropping single characters
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("Tom's HOUSE, a 1954 tale"), ["tom", "house", "1954", "tale"]
+        )
+
+    # Test shard names for ASCII and other prefixes
+    def test_shard_name(self):
+        self.assertEqual(shard_name("tolkien"), "to")
+        self.assertEqual(shard_name("élan"), "_")
+        self.assertEqual(shard_name("_x"), "_")
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content_dir = os.path.join(self.root, "content")
+        self.public_dir = os.path.join(self.root, "public")
+        self.template_path = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.index_path = os.path.join(self.root, "index.json")
+        os.makedirs(self.content_dir)
+        self.write("template.html", TEMPLATE)
+        self.write("content/a.md", "# Alpha\n\nThe tower and the **tomb**")
+        self.write("content/b.md", "# Beta\n\nA tower of zebras")
+        search_options.configure(True)
+
+    def tearDown(self):
+        search_options.configure(False)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(os.path.join(self.root, path), "w") as f:
+            f.write(text)
+
+    def build(self, remove_stale=True):
+        manifest = BuildManifest.load(self.manifest_path, self.public_dir)
+        site_index = SiteIndex.load(self.index_path)
+        site_index.required = ("search",)
+        check_search_index(site_index, manifest)
+        generate_pages_recursive(
+            "/",
+            self.content_dir,
+            self.template_path,
+            self.public_dir,
+            manifest,
+            site_index=site_index,
+        )
+        site_index.remove_unseen()
+        update_search_index(
+            site_index, manifest, "/", lambda key: page_terms(self.content_dir, key)
+        )
+        if remove_stale:
+            manifest.remove_stale()
+        manifest.save()
+        site_index.save()
+
+    def read(self, name):
+        with open(os.path.join(self.public_dir, "search", name)) as f:
+            return json.load(f)
+
+    def shard_path(self, name):
+        return os.path.join(self.public_dir, "search", name)
+
+    # Test the document table and postings
+    def test_index(self):
+        self.build()
+        self.assertEqual(
+            self.read("docs.json"),
+            {
+                "prefix_length": 2,
+                "docs": {"0": ["/a.html", "Alpha"], "1": ["/b.html", "Beta"]},
+            },
+        )
+        self.assertEqual(
+            self.read("to.json"),
+            {"tomb": [[0, 1]], "tower": [[0, 1], [1, 1]]},
+        )
+        self.assertEqual(self.read("th.json"), {"the": [[0, 2]]})
+
+    # Test that only shards holding a changed page's terms are rewritten
+    def test_incremental(self):
+        self.build()
+        os.utime(self.shard_path("ze.json"), ns=(0, 0))
+        self.write("content/a.md", "# Alpha\n\nThe tower")
+        self.build()
+        self.assertEqual(os.stat(self.shard_path("ze.json")).st_mtime_ns, 0)
+        self.assertEqual(self.read("to.json"), {"tower": [[0, 1], [1, 1]]})
+
+        os.remove(os.path.join(self.content_dir, "b.md"))
+        self.build()
+        self.assertFalse(os.path.exists(self.shard_path("ze.json")))
+        self.assertEqual(self.read("to.json"), {"tower": [[0, 1]]})
+        self.assertEqual(self.read("docs.json")["docs"], {"0": ["/a.html", "Alpha"]})
+
+    # Test that an emptied shard is removed without the stale output sweep
+    def test_emptied_shard(self):
+        self.build()
+        os.remove(os.path.join(self.content_dir, "b.md"))
+        self.build(remove_stale=False)
+        self.assertFalse(os.path.exists(self.shard_path("ze.json")))
+        manifest = BuildManifest.load(self.manifest_path, self.public_dir)
+        self.assertNotIn("search/ze.json", manifest.entries)
+
+    # Test that a missing shard makes the same build index every page again
+    def test_lost_shard(self):
+        self.build()
+        os.remove(self.shard_path("ze.json"))
+        self.write("content/a.md", "# Alpha\n\nThe tower")
+        self.build()
+        self.assertEqual(self.read("ze.json"), {"zebras": [[1, 1]]})
+        self.assertEqual(self.read("to.json"), {"tower": [[0, 1], [1, 1]]})
+        self.assertEqual(len(self.read("docs.json")["docs"]), 2)
+
+    # Test that an unreadable shard rebuilds the whole index in the same build
+    def test_unreadable_shard(self):
+        self.build()
+        with open(self.shard_path("to.json"), "w") as f:
+            f.write("{")
+        self.write("content/a.md", "# Alpha\n\nThe tower and the zoo")
+        self.build()
+        docs = {
+            doc[0]: int(doc_id)
+            for doc_id, doc in self.read("docs.json")["docs"].items()
+        }
+        alpha, beta = docs["/a.html"], docs["/b.html"]
+        self.assertEqual(
+            self.read("to.json"), {"tower": sorted([[alpha, 1], [beta, 1]])}
+        )
+        self.assertEqual(self.read("ze.json"), {"zebras": [[beta, 1]]})
+        self.assertEqual(self.read("zo.json"), {"zoo": [[alpha, 1]]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src import sections
+from src.build_manifest import BuildManifest
+from src.sections import generate_section, iter_feed, section_posts
+from src.site_index import SiteIndex
+from src.url_resolver import url_resolver
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+def post(title, date=None, draft=False):
+    slug = title.lower()
+    return {
+        "url": f"/blog/{slug}/",
+        "title": title,
+        "date": date,
+        "updated": None,
+        "tags": ["t"],
+        "draft": draft,
+        "excerpt": f"<p>About {slug}</p>",
+        "word_count": 3,
+    }
+
+
+class TestSections(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public_dir = os.path.join(self.tmp.name, "public")
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        self.content_dir = os.path.join(self.tmp.name, "content")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        with open(self.template_path, "w") as f:
+            f.write(TEMPLATE)
+        self.site_index = SiteIndex(os.path.join(self.tmp.name, "index.json"))
+        self.site_index.pages = {
+            "index.md": post("Home"),
+            "blog/a/index.md": post("A", "2024-01-01"),
+            "blog/b/index.md": post("B", "2024-02-01"),
+            "blog/c/index.md": post("C"),
+            "blog/d/index.md": post("D", "2024-03-01", draft=True),
+        }
+
+    def tearDown(self):
+        url_resolver.set_basepath("/")
+        self.tmp.cleanup()
+
+    def build(self):
+        manifest = BuildManifest.load(self.manifest_path, self.public_dir)
+        generate_section(
+            "blog",
+            self.site_index,
+            manifest,
+            self.template_path,
+            "/site/",
+            2,
+            "https://example.com",
+            self.content_dir,
+        )
+        manifest.save()
+
+    def read(self, *parts):
+        with open(os.path.join(self.public_dir, *parts)) as f:
+            return f.read()
+
+    # Test that published posts in the section come newest first
+    def test_section_posts(self):
+        titles = [p["title"] for _, p in section_posts(self.site_index, "blog")]
+        self.assertEqual(titles, ["B", "A", "C"])
+
+    # Test the paginated listing pages
+    def test_listing_pages(self):
+        self.build()
+        self.assertEqual(
+            self.read("blog", "index.html"),
+            '<title>Blog</title><div class="post-list">'
+            '<article><h2><a href="/site/blog/b/">B</a></h2>'
+            '<p><time datetime="2024-02-01">2024-02-01</time></p><p>About b</p>'
+            '</article><article><h2><a href="/site/blog/a/">A</a></h2>'
+            '<p><time datetime="2024-01-01">2024-01-01</time></p><p>About a</p>'
+            '</article><nav><a href="/site/blog/page/2/" rel="next">Older posts</a>'
+            '<a href="/site/blog/atom.xml" type="application/atom+xml">Atom feed</a>'
+            "</nav></div>",
+        )
+        self.assertIn(
+            '<a href="/site/blog/c/">C</a>',
+            self.read("blog", "page", "2", "index.html"),
+        )
+        self.assertIn('rel="prev"', self.read("blog", "page", "2", "index.html"))
+
+    # Test that only listings showing a changed post are written again
+    def test_incremental(self):
+        self.build()
+        page_two = os.path.join(self.public_dir, "blog", "page", "2", "index.html")
+        os.utime(page_two, ns=(0, 0))
+        self.site_index.pages["blog/a/index.md"]["excerpt"] = "<p>Edited</p>"
+        self.site_index.pages["blog/a/index.md"]["word_count"] = 10
+        self.build()
+        self.assertEqual(os.stat(page_two).st_mtime_ns, 0)
+        self.assertIn("<p>Edited</p>", self.read("blog", "index.html"))
+        self.assertIn("&lt;p&gt;Edited&lt;/p&gt;", self.read("blog", "atom.xml"))
+
+    # Test that a new renderer version rewrites listings and the feed
+    def test_renderer_change(self):
+        self.build()
+        paths = [
+            os.path.join(self.public_dir, "blog", "index.html"),
+            os.path.join(self.public_dir, "blog", "atom.xml"),
+        ]
+        for path in paths:
+            os.utime(path, ns=(0, 0))
+        with mock.patch.object(sections, "RENDERER_VERSION", 0):
+            self.build()
+        for path in paths:
+            self.assertNotEqual(os.stat(path).st_mtime_ns, 0)
+
+    # Test the Atom feed document
+    def test_feed(self):
+        post = self.site_index.pages["blog/b/index.md"]
+        url_resolver.set_basepath("/site/")
+        feed = "".join(
+            iter_feed(
+                "blog", [(post, "2024-02-01T00:00:00Z")], "https://example.com", "Me"
+            )
+        )
+        self.assertIn("<id>https://example.com/site/blog/</id>", feed)
+        self.assertIn("<updated>2024-02-01T00:00:00Z</updated>", feed)
+        self.assertIn("<author><name>Me</name></author>", feed)
+        self.assertIn('<link href="https://example.com/site/blog/b/"/>', feed)
+        self.assertIn('<category term="t"/>', feed)
+        self.assertTrue(feed.endswith("</entry>\n</feed>\n"))
+
+    # Test that front matter dates are normalized to RFC 3339 or left out
+    def test_feed_published(self):
+        entry = dict(self.site_index.pages["blog/b/index.md"])
+
+        def published(date):
+            entry["date"] = date
+            feed = "".join(
+                iter_feed("blog", [(entry, "2024-02-01T00:00:00Z")], None, "Me")
+            )
+            start = feed.find("<published>")
+            return None if start < 0 else feed[start + 11 : feed.index("</", start)]
+
+        self.assertEqual(published("2024-03-05"), "2024-03-05T00:00:00Z")
+        self.assertEqual(published("2024-03-05T10:00Z"), "2024-03-05T10:00:00Z")
+        self.assertEqual(
+            published("2024-03-05T10:00:30.5+01:00"), "2024-03-05T10:00:30.5+01:00"
+        )
+        for date in (
+            "2024-03-05 10:00",
+            "2024-03-05T10:00",
+            "2024",
+            "2024-3-5",
+            "2024-02-30",
+            "2024-03-05T25:00Z",
+            "soon",
+            None,
+        ):
+            self.assertIsNone(published(date), date)
+
+    # Test that an invalid date falls back to the source's mtime
+    def test_feed_bad_date(self):
+        source_path = os.path.join(self.content_dir, "blog", "c", "index.md")
+        os.makedirs(os.path.dirname(source_path))
+        with open(source_path, "w") as f:
+            f.write("---\ndate: 2024-03-05 10:00\n---\n# C")
+        os.utime(source_path, (1718454600, 1718454600))
+        self.build()
+        feed = self.read("blog", "atom.xml")
+        self.assertIn("<updated>2024-06-15T12:30:00Z</updated>\n<author>", feed)
+        self.assertNotIn("2024-03-05", feed)
+
+    # Test that an undated post's feed entry uses its source's mtime
+    def test_feed_undated(self):
+        source_path = os.path.join(self.content_dir, "blog", "c", "index.md")
+        os.makedirs(os.path.dirname(source_path))
+        with open(source_path, "w") as f:
+            f.write("# C")
+        os.utime(source_path, (1718454600, 1718454600))
+        self.build()
+        feed = self.read("blog", "atom.xml")
+        self.assertIn("<updated>2024-06-15T12:30:00Z</updated>\n<author>", feed)
+        self.assertIn("<author><name>example.com</name></author>", feed)
+        self.assertNotIn("1970", feed)
+
+
+if __name__ == "__main__":
+    unittest.main()
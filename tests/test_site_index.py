@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from src.build_manifest import BuildManifest
+from src.generate_page import generate_pages_recursive
+from src.site_index import SiteIndex, page_url
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+POST = "---\ndate: 2024-01-05\ntags: news\n---\n# Post\n\nThree short words"
+
+
+class TestSiteIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content_dir = os.path.join(self.root, "content")
+        self.public_dir = os.path.join(self.root, "public")
+        self.template_path = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.index_path = os.path.join(self.root, "index.json")
+        os.makedirs(os.path.join(self.content_dir, "blog", "post"))
+        self.write(self.template_path, TEMPLATE)
+        self.write(os.path.join(self.content_dir, "index.md"), "# Home")
+        self.write(os.path.join(self.content_dir, "blog", "post", "index.md"), POST)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self):
+        manifest = BuildManifest.load(self.manifest_path, self.public_dir)
+        site_index = SiteIndex.load(self.index_path)
+        generate_pages_recursive(
+            "/",
+            self.content_dir,
+            self.template_path,
+            self.public_dir,
+            manifest,
+            site_index=site_index,
+        )
+        site_index.remove_unseen()
+        manifest.remove_stale()
+        manifest.save()
+        site_index.save()
+        return site_index
+
+    # Test output URLs for index and other pages
+    def test_page_url(self):
+        self.assertEqual(page_url("out", os.path.join("out", "index.html")), "/")
+        self.assertEqual(
+            page_url("out", os.path.join("out", "blog", "a", "index.html")),
+            "/blog/a/",
+        )
+        self.assertEqual(page_url("out", os.path.join("out", "a.html")), "/a.html")
+
+    # Test the entries written for each page
+    def test_entries(self):
+        site_index = self.build()
+        self.assertEqual(
+            site_index.pages["blog/post/index.md"],
+            {
+                "url": "/blog/post/",
+                "title": "Post",
+                "date": "2024-01-05",
+                "updated": None,
+                "tags": ["news"],
+                "draft": False,
+                "excerpt": "<p>Three short words</p>",
+                "word_count": 4,
+                "links": [],
+            },
+        )
+        self.assertEqual(site_index.pages["index.md"]["title"], "Home")
+
+    # Test that skipped pages keep their entries and removed pages lose them
+    def test_incremental(self):
+        self.build()
+        os.remove(os.path.join(self.content_dir, "index.md"))
+        site_index = self.build()
+        self.assertEqual(list(site_index.pages), ["blog/post/index.md"])
+        self.assertEqual(site_index.pages["blog/post/index.md"]["title"], "Post")
+
+    # Test that an unchanged page missing from the index is rendered again
+    def test_missing_entry(self):
+        self.build()
+        os.remove(self.index_path)
+        site_index = self.build()
+        self.assertEqual(sorted(site_index.pages), ["blog/post/index.md", "index.md"])
+
+    # Test which entry fields count as changed since take_changes()
+    def test_changed_fields(self):
+        site_index = SiteIndex(self.index_path)
+        site_index.pages = {"a.md": {"url": "/a.html", "title": "A"}}
+        self.assertEqual(site_index.changed_fields(), set())
+        site_index.update("a.md", {"url": "/a.html", "title": "B"})
+        self.assertEqual(site_index.changed_fields(), {"title"})
+        site_index.update("b.md", {"url": "/b.html", "title": "B"})
+        self.assertEqual(site_index.changed_fields(), {"url", "title"})
+        site_index.take_changes()
+        self.assertEqual(site_index.changed_fields(), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
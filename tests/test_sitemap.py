@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from src.build_manifest import BuildManifest
+from src.site_index import SiteIndex
+from src.sitemap import SitemapWriter, page_lastmod, write_sitemaps
+
+BASE_URL = "https://example.com/site/"
+
+
+def entry(url, date=None, draft=False):
+    return {"url": url, "date": date, "updated": None, "draft": draft}
+
+
+class TestSitemap(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.output_dir, name)) as f:
+            return f.read()
+
+    # Test a sitemap small enough for one file
+    def test_single_file(self):
+        writer = SitemapWriter(self.output_dir, BASE_URL)
+        writer.add("/", "2024-01-05")
+        writer.add("/a&b/")
+        files = writer.close()
+        self.assertEqual([os.path.basename(path) for path, _ in files], ["sitemap.xml"])
+        self.assertEqual(
+            self.read("sitemap.xml"),
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            "<url><loc>https://example.com/site/</loc>"
+            "<lastmod>2024-01-05</lastmod></url>\n"
+            "<url><loc>https://example.com/site/a&amp;b/</loc></url>\n"
+            "</urlset>\n",
+        )
+
+    # Test splitting on the URL count and on the file size
+    def test_split(self):
+        writer = SitemapWriter(self.output_dir, BASE_URL, max_urls=2)
+        for i in range(5):
+            writer.add(f"/{i}/")
+        names = [os.path.basename(path) for path, _ in writer.close()]
+        self.assertEqual(
+            names, ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"]
+        )
+        self.assertIn(
+            "<sitemap><loc>https://example.com/site/sitemap-3.xml</loc></sitemap>",
+            self.read("sitemap.xml"),
+        )
+        self.assertEqual(self.read("sitemap-3.xml").count("<url>"), 1)
+
+        writer = SitemapWriter(self.output_dir, BASE_URL, max_bytes=300)
+        for i in range(5):
+            writer.add(f"/{i}/")
+        for path, _ in writer.close()[:-1]:
+            self.assertLessEqual(os.path.getsize(path), 300)
+            self.assertTrue(self.read(path).endswith("</urlset>\n"))
+
+    # Test lastmod from front matter first, then the source file
+    def test_lastmod(self):
+        source = os.path.join(self.output_dir, "a.md")
+        with open(source, "w") as f:
+            f.write("# A")
+        os.utime(source, (0, 86400 * 365))
+        self.assertEqual(page_lastmod(entry("/a/", "2024-01-05"), source), "2024-01-05")
+        self.assertEqual(page_lastmod(entry("/a/"), source), "1971-01-01")
+
+    # Test that front matter values that aren't W3C dates are passed over
+    def test_lastmod_w3c(self):
+        source = os.path.join(self.output_dir, "a.md")
+        with open(source, "w") as f:
+            f.write("# A")
+        os.utime(source, (0, 86400 * 365))
+        for value in (
+            "2024",
+            "2024-03",
+            "2024-03-05",
+            "2024-03-05T10:00Z",
+            "2024-03-05T10:00:30.25+01:00",
+        ):
+            self.assertEqual(page_lastmod(entry("/a/", value), source), value)
+        for value in (
+            "2024-03-05 10:00",
+            "2024-03-05T10:00",
+            "2024-3-5",
+            "2024-13",
+            "2024-02-30",
+            "March 5th",
+        ):
+            self.assertEqual(page_lastmod(entry("/a/", value), source), "1971-01-01")
+
+    # Test pages from the site index and removal of files no longer needed
+    def test_write_sitemaps(self):
+        site_index = SiteIndex(None)
+        site_index.pages = {
+            "a.md": entry("/a.html", "2024-01-05"),
+            "b.md": entry("/b.html", draft=True),
+            "c.md": entry("/c.html", "2024-02-01"),
+        }
+        manifest = BuildManifest(None, self.output_dir)
+        write_sitemaps(site_index, self.output_dir, manifest, BASE_URL, ["/x/"], 1)
+        self.assertEqual(
+            sorted(manifest.entries),
+            ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"],
+        )
+        self.assertNotIn(
+            "b.html", self.read("sitemap-1.xml") + self.read("sitemap-2.xml")
+        )
+
+        manifest.seen.clear()
+        write_sitemaps(site_index, self.output_dir, manifest, BASE_URL)
+        manifest.remove_stale()
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ["sitemap.xml"])
+        self.assertIn(
+            "<loc>https://example.com/site/c.html</loc>", self.read("sitemap.xml")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from src.build_manifest import BuildManifest
+from src.copy_static import sync_files_recursive
+from src.generate_page import generate_pages_recursive
+from src.staging import (
+    carry_untracked_files,
+    prepare_staging_dir,
+    swap_into_place,
+)
+
+
+class TestStagedBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content_dir = os.path.join(self.root, "content")
+        self.static_dir = os.path.join(self.root, "static")
+        self.public_dir = os.path.join(self.root, "public")
+        self.template_path = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        os.makedirs(self.content_dir)
+        os.makedirs(self.static_dir)
+        self.write(self.template_path, "{{ Content }}")
+        self.write(os.path.join(self.content_dir, "index.md"), "# Home")
+        self.write(os.path.join(self.content_dir, "about.md"), "# About")
+        self.write(os.path.join(self.static_dir, "index.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def public(self, name):
+        return os.path.join(self.public_dir, name)
+
+    def build(self):
+        staging_dir = prepare_staging_dir(self.public_dir)
+        manifest = BuildManifest.load(self.manifest_path, staging_dir, self.public_dir)
+        sync_files_recursive(self.static_dir, staging_dir, manifest)
+        generate_pages_recursive(
+            "/", self.content_dir, self.template_path, staging_dir, manifest
+        )
+        manifest.remove_stale()
+        carry_untracked_files(self.public_dir, staging_dir, manifest)
+        swap_into_place(staging_dir, self.public_dir)
+        manifest.output_dir = self.public_dir
+        manifest.previous_dir = None
+        manifest.save()
+
+    # Test that a staged build produces the full output and no staging leftovers
+    def test_first_build(self):
+        self.build()
+        self.assertEqual(
+            sorted(os.listdir(self.public_dir)),
+            ["about.html", "index.css", "index.html"],
+        )
+        self.assertEqual(os.listdir(self.root).count("public.staging"), 0)
+
+    # Test that unchanged outputs are hard-linked instead of rewritten
+    def test_unchanged_files_are_linked(self):
+        self.build()
+        inodes = {
+            name: os.stat(self.public(name)).st_ino
+            for name in ["index.html", "about.html", "index.css"]
+        }
+        self.write(os.path.join(self.content_dir, "about.md"), "# About us")
+        self.build()
+        self.assertEqual(
+            os.stat(self.public("index.html")).st_ino, inodes["index.html"]
+        )
+        self.assertEqual(os.stat(self.public("index.css")).st_ino, inodes["index.css"])
+        self.assertNotEqual(
+            os.stat(self.public("about.html")).st_ino, inodes["about.html"]
+        )
+
+    # Test that removed sources are dropped but untracked files survive
+    def test_removed_and_untracked_files(self):
+        self.build()
+        self.write(self.public("CNAME"), "example.com")
+        os.remove(os.path.join(self.content_dir, "about.md"))
+        self.build()
+        self.assertFalse(os.path.exists(self.public("about.html")))
+        self.assertTrue(os.path.exists(self.public("CNAME")))
+
+    # Test that nothing is carried over when the manifest is missing
+    def test_missing_manifest_builds_clean(self):
+        self.build()
+        self.write(self.public("old.html"), "old")
+        os.remove(self.manifest_path)
+        self.build()
+        self.assertFalse(os.path.exists(self.public("old.html")))
+        self.assertTrue(os.path.exists(self.public("about.html")))
+
+    # Test that the swap replaces an existing directory's contents
+    def test_swap_into_place(self):
+        os.makedirs(self.public_dir)
+        self.write(self.public("old.html"), "old")
+        staging_dir = prepare_staging_dir(self.public_dir)
+        self.write(os.path.join(staging_dir, "new.html"), "new")
+        swap_into_place(staging_dir, self.public_dir)
+        self.assertEqual(os.listdir(self.public_dir), ["new.html"])
+        self.assertFalse(os.path.exists(staging_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+from src.template import (
+    compile_template,
+    load_template,
+    select_template,
+)
+
+
+class TestTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    # Test substituting the title and content placeholders
+    def test_render_variables(self):
+        path = self.write("t.html", "<title>{{ Title }}</title>{{Content}}")
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><p>x</p>",
+        )
+
+    # Test that unknown placeholders are left as written
+    def test_unknown_variable_kept(self):
+        path = self.write("t.html", "{{ Title }} {{ Other }}")
+        self.assertEqual(
+            compile_template(path).render({"Title": "Hi"}), "Hi {{ Other }}"
+        )
+
+    # Test that substituted values are not scanned for placeholders again
+    def test_values_not_reinterpreted(self):
+        path = self.write("t.html", "{{ Title }}|{{ Content }}")
+        self.assertEqual(
+            compile_template(path).render({"Title": "{{ Content }}", "Content": "c"}),
+            "{{ Content }}|c",
+        )
+
+    # Test that the basepath is applied to template attributes at compile time
+    def test_basepath_applied_to_literals(self):
+        path = self.write("t.html", '<link href="/index.css" /><img src="/a.png" />')
+        template = compile_template(path, "/repo/")
+        self.assertEqual(
+            template.render({}),
+            '<link href="/repo/index.css" /><img src="/repo/a.png" />',
+        )
+
+    # Test inlining partials, including nested ones relative to their parent
+    def test_include_partials(self):
+        self.write("partials/nav.html", '<nav>{% include "links.html" %}</nav>')
+        self.write("partials/links.html", "<a>{{ Title }}</a>")
+        path = self.write("t.html", '{% include "partials/nav.html" %}{{ Content }}')
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "C"}), "<nav><a>T</a></nav>C"
+        )
+        self.assertEqual(len(template.dependencies), 3)
+
+    # Test that a recursive include raises an error
+    def test_recursive_include(self):
+        path = self.write("t.html", '{% include "t.html" %}')
+        with self.assertRaises(ValueError):
+            compile_template(path)
+
+    # Test that a missing partial raises an error
+    def test_missing_include(self):
+        path = self.write("t.html", '{% include "missing.html" %}')
+        with self.assertRaises(ValueError):
+            compile_template(path)
+
+    # Test that compiled templates are cached until a dependency changes
+    def test_load_template_cache(self):
+        partial = self.write("p.html", "one")
+        path = self.write("t.html", '{% include "p.html" %}')
+        first = load_template(path)
+        self.assertIs(load_template(path), first)
+        self.write("p.html", "two")
+        os.utime(partial, ns=(1, 1))
+        self.assertEqual(load_template(path).render({}), "two")
+
+    # Test choosing the most specific section layout for a page
+    def test_select_template(self):
+        layouts_dir = os.path.join(self.root, "layouts")
+        blog_layout = self.write("layouts/blog.html", "")
+        default = os.path.join(self.root, "template.html")
+        content_dir = os.path.join(self.root, "content")
+        self.assertEqual(
+            select_template(
+                default,
+                layouts_dir,
+                content_dir,
+                os.path.join(content_dir, "blog", "tom", "index.md"),
+            ),
+            blog_layout,
+        )
+        self.assertEqual(
+            select_template(
+                default, layouts_dir, content_dir, os.path.join(content_dir, "index.md")
+            ),
+            default,
+        )
+        self.assertEqual(
+            select_template(default, None, content_dir, "content/blog/x.md"), default
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
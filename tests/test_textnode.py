@@ -64,6 +64,13 @@ class TestTextNode(unittest.TestCase):
         node = TextNode("Italic text", TextType.ITALIC)
         self.assertEqual(node.text_type, TextType.ITALIC)
 
+    # Test that TextNode uses slots and still compares by value
+    def test_slots_equality(self):
+        node = TextNode("a", TextType.LINK, "/x")
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(node, TextNode("a", TextType.LINK, "/x"))
+        self.assertNotEqual(node, "a")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.watch import diff_stats, poll_interval, scan, wait_for_changes
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "content", "blog"))
+        self.page = os.path.join(self.root, "content", "blog", "post.md")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.page, "# Post")
+        self.write(self.template, "{{ Content }}")
+        self.paths = [
+            os.path.join(self.root, "content"),
+            self.template,
+            os.path.join(self.root, "missing"),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    # Test that scanning covers files in directories and single files
+    def test_scan(self):
+        self.assertEqual(set(scan(self.paths)), {self.page, self.template})
+
+    # Test detecting changed, added and removed files
+    def test_diff_stats(self):
+        before = scan(self.paths)
+        added = os.path.join(self.root, "content", "new.md")
+        self.write(added, "# New")
+        os.utime(self.template, ns=(1, 1))
+        os.remove(self.page)
+        changed, removed = diff_stats(before, scan(self.paths))
+        self.assertEqual(changed, {added, self.template})
+        self.assertEqual(removed, {self.page})
+
+    # Test that a burst of edits is reported as one debounced batch
+    def test_wait_for_changes_debounces(self):
+        stats = scan(self.paths)
+
+        def edit():
+            for i in range(3):
+                time.sleep(0.01)
+                self.write(self.page, "# Post" + "!" * (i + 1))
+
+        thread = threading.Thread(target=edit)
+        thread.start()
+        new_stats, changed, removed = wait_for_changes(
+            self.paths, stats, interval=0.005, debounce=0.05
+        )
+        thread.join()
+        self.assertEqual(changed, {self.page})
+        self.assertEqual(removed, set())
+        self.assertEqual(new_stats[self.page][1], len("# Post!!!"))
+
+    # Test that slow scans space out the polls
+    def test_poll_interval(self):
+        self.assertEqual(poll_interval(0.02, 0.0001), 0.02)
+        self.assertAlmostEqual(poll_interval(0.02, 0.01), 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()